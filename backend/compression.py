@@ -0,0 +1,204 @@
+"""Negotiated gzip/brotli response compression.
+
+Bodies smaller than `minimum_size`, responses that already carry a
+Content-Encoding and media types that do not compress (gzip downloads, images)
+are sent as they are. Responses with a strong ETag (the cached list responses)
+are cacheable: their compressed bodies are kept by (ETag, encoding) in a small
+LRU so a repeat request is served without compressing again. Brotli is offered
+only when the `brotli` package is installed.
+"""
+import gzip
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    encodings = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            encodings[coding.strip().lower()] = quality
+    return encodings
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (ETag, encoding), bounded in bytes."""
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: Tuple[str, str], body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses}
+
+
+class ResponseCompressor:
+    """Compression settings, the compressed-body cache and byte counters shared
+    with `CompressionMiddleware`."""
+
+    def __init__(self, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 cache: Optional[CompressedBodyCache] = None):
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = cache
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+        self.responses = {encoding: 0 for encoding in self.encodings}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = accepted_encodings(accept_encoding)
+        best, best_quality = None, 0.0
+        for encoding in self.encodings:
+            quality = accepted.get(encoding, accepted.get("*", 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def compress_cached(self, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        """Compress `body`, reusing the cached result for a strong ETag."""
+        if self.cache is None or not etag or etag.startswith("W/"):
+            return self.compress(body, encoding)
+        key = (etag, encoding)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = self.compress(body, encoding)
+            self.cache.put(key, compressed)
+        return compressed
+
+    def stream(self, encoding: str):
+        """(process, flush, finish) callables for a streamed body."""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.flush, compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+    def stats(self) -> dict:
+        return {
+            "responses": dict(self.responses),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing HTTP response bodies with a ResponseCompressor."""
+
+    def __init__(self, app, compressor: ResponseCompressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        compressor = self.compressor
+        encoding = compressor.choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+        stream = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough, stream
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if stream is None:
+                headers = MutableHeaders(scope=start_message)
+                if (
+                    "content-encoding" in headers
+                    or start_message["status"] in (204, 304)
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < compressor.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                headers["Content-Encoding"] = encoding
+                compressor.responses[encoding] += 1
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # The compressed representation is only semantically equal to the original
+                    headers["ETag"] = "W/" + etag
+                if not more_body:
+                    compressed = compressor.compress_cached(body, encoding, etag)
+                    compressor.bytes_in += len(body)
+                    compressor.bytes_out += len(compressed)
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                del headers["Content-Length"]
+                stream = compressor.stream(encoding)
+                await send(start_message)
+
+            process, flush, finish = stream
+            chunk = process(body) + (flush() if more_body else finish())
+            compressor.bytes_in += len(body)
+            compressor.bytes_out += len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
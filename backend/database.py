@@ -0,0 +1,136 @@
+"""MongoDB client lifecycle: pool settings from the environment, a warm-up ping,
+and connection pool statistics for the readiness probe."""
+import os
+import time
+from typing import Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters fed by pymongo's pool events."""
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.created = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def connection_created(self, event):
+        self.created += 1
+        self.open += 1
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_checked_out(self, event):
+        self.checkouts += 1
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def snapshot(self) -> dict:
+        return {
+            "open_connections": self.open,
+            "checked_out": self.checked_out,
+            "connections_created": self.created,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "pool_clears": self.pool_clears,
+        }
+
+
+def client_options_from_env() -> dict:
+    """AsyncIOMotorClient keyword arguments from MONGO_* environment variables."""
+    return {
+        "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+        "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+        "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '60000')),
+        "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+        "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '2000')),
+    }
+
+
+class MongoConnection:
+    """Owns the Motor client for the lifetime of the app. Nothing here touches the
+    network until `connect()` is awaited from the app lifespan."""
+
+    def __init__(self, url: str, db_name: str, options: Optional[dict] = None,
+                 event_listeners: Sequence = ()):
+        self.url = url
+        self.db_name = db_name
+        self.options = options if options is not None else client_options_from_env()
+        self.pool_stats = PoolStats()
+        self.event_listeners = [self.pool_stats, *event_listeners]
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.ready = False
+        self.last_error: Optional[str] = None
+
+    @property
+    def db(self):
+        return self.client[self.db_name]
+
+    async def connect(self) -> None:
+        """Create the client and warm it up with a ping (which also opens the
+        first pooled connection). A failed ping is recorded, not raised."""
+        self.client = AsyncIOMotorClient(self.url, event_listeners=self.event_listeners, **self.options)
+        await self.ping()
+
+    async def ping(self) -> Optional[float]:
+        """Round-trip time in milliseconds, or None when MongoDB is unreachable."""
+        start = time.perf_counter()
+        try:
+            await self.client.admin.command("ping")
+        except PyMongoError as e:
+            self.ready = False
+            self.last_error = str(e)
+            return None
+        self.ready = True
+        self.last_error = None
+        return round((time.perf_counter() - start) * 1000, 3)
+
+    async def health(self) -> dict:
+        ping_ms = await self.ping() if self.client is not None else None
+        return {
+            "status": "ok" if ping_ms is not None else "unavailable",
+            "mongo": {
+                "ping_ms": ping_ms,
+                "error": self.last_error,
+                "max_pool_size": self.options.get("maxPoolSize"),
+                "min_pool_size": self.options.get("minPoolSize"),
+                "pool": self.pool_stats.snapshot(),
+            },
+        }
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+        self.ready = False
@@ -0,0 +1,203 @@
+"""In-memory duplicate filter for contact submissions, checked before any MongoDB I/O.
+
+A submission is reduced to a fingerprint of its normalized email and message, so
+resubmits and copy-paste spam that only differ in case, whitespace, punctuation
+or a ``+tag`` on the address collapse to the same fingerprint. Two filters
+remember recent fingerprints:
+
+* ``LruDuplicateFilter`` keeps exact fingerprints with their timestamps, bounded
+  to ``max_entries``. No false positives; roughly 100 bytes per entry.
+* ``RotatingBloomFilter`` keeps two Bloom filter generations sized from a memory
+  budget and a target false-positive rate. A fingerprint is remembered for
+  between one and two windows, and a generation that reaches its capacity is
+  rotated early so the false-positive rate stays within budget.
+
+A submission holds its fingerprint in a pending set from the check until its
+insert finishes, so concurrent copies are rejected too; it is remembered by the
+filter only once stored, so a failed insert can be retried.
+"""
+import hashlib
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Set
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def fingerprint(email: str, message: str) -> bytes:
+    local, _, domain = email.strip().lower().partition("@")
+    local = local.split("+", 1)[0]
+    text = _NON_WORD.sub(" ", message.casefold()).strip()
+    return hashlib.blake2b(f"{local}@{domain}\0{text}".encode(), digest_size=16).digest()
+
+
+class DuplicateFilter:
+    """Reservations shared by the filters; subclasses implement `seen` and `add`."""
+
+    def __init__(self):
+        self._pending: Set[bytes] = set()
+        self.checks = 0
+        self.rejected = 0
+
+    def reserve(self, key: bytes, now: Optional[float] = None) -> bool:
+        """Hold `key` for a submission about to be inserted. False (and counted as
+        rejected) if it duplicates a stored or in-flight submission."""
+        if key in self._pending:
+            self.checks += 1
+            self.rejected += 1
+            return False
+        if self.seen(key, now):
+            return False
+        self._pending.add(key)
+        return True
+
+    def commit(self, key: bytes, now: Optional[float] = None) -> None:
+        """The reserved submission was stored: remember it for the window."""
+        self._pending.discard(key)
+        self.add(key, now)
+
+    def release(self, key: bytes) -> None:
+        """Drop a reservation that was not committed (no-op after `commit`)."""
+        self._pending.discard(key)
+
+    def check_and_add(self, key: bytes, now: Optional[float] = None) -> bool:
+        if self.seen(key, now):
+            return True
+        self.add(key, now)
+        return False
+
+
+class LruDuplicateFilter(DuplicateFilter):
+    kind = "lru"
+
+    def __init__(self, window: float = 3600.0, max_entries: int = 10000):
+        super().__init__()
+        self.window = window
+        self.max_entries = max_entries
+        self._seen: "OrderedDict[bytes, float]" = OrderedDict()
+        self.evictions = 0
+
+    def seen(self, key: bytes, now: Optional[float] = None) -> bool:
+        """True (and counted as rejected) if `key` was added within the window."""
+        now = time.monotonic() if now is None else now
+        self.checks += 1
+        seen_at = self._seen.get(key)
+        if seen_at is not None and now - seen_at < self.window:
+            self.rejected += 1
+            return True
+        return False
+
+    def add(self, key: bytes, now: Optional[float] = None) -> None:
+        self._seen[key] = time.monotonic() if now is None else now
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "checks": self.checks,
+            "rejected": self.rejected,
+            "entries": len(self._seen),
+            "in_flight": len(self._pending),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
+
+
+class RotatingBloomFilter(DuplicateFilter):
+    kind = "bloom"
+
+    def __init__(self, window: float = 3600.0, fp_rate: float = 1e-6, max_bytes: int = 1 << 20):
+        super().__init__()
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        self.window = window
+        self.fp_rate = fp_rate
+        # The budget covers both generations.
+        self.bits = max(64, (max_bytes // 2) * 8)
+        self.capacity = max(1, int(self.bits * math.log(2) ** 2 / -math.log(fp_rate)))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self._current = bytearray(self.bits // 8)
+        self._previous = bytearray(self.bits // 8)
+        self._current_count = 0
+        self._rotated_at: Optional[float] = None
+        self.rotations = 0
+        self.early_rotations = 0
+
+    def _positions(self, key: bytes):
+        # Double hashing over the two halves of the 128-bit fingerprint
+        h1 = int.from_bytes(key[:8], "little")
+        h2 = int.from_bytes(key[8:16], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    @staticmethod
+    def _contains(bits: bytearray, positions) -> bool:
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def _rotate(self, now: float) -> None:
+        self._previous = self._current
+        self._current = bytearray(self.bits // 8)
+        self._current_count = 0
+        self._rotated_at = now
+        self.rotations += 1
+
+    def _age(self, now: float) -> None:
+        if self._rotated_at is None:
+            self._rotated_at = now
+        if now - self._rotated_at >= 2 * self.window:
+            self._rotate(now)
+            self._rotate(now)
+        elif now - self._rotated_at >= self.window:
+            self._rotate(now)
+
+    def seen(self, key: bytes, now: Optional[float] = None) -> bool:
+        """True (and counted as rejected) if `key` was probably added within the window."""
+        now = time.monotonic() if now is None else now
+        self.checks += 1
+        self._age(now)
+        positions = self._positions(key)
+        if self._contains(self._current, positions) or self._contains(self._previous, positions):
+            self.rejected += 1
+            return True
+        return False
+
+    def add(self, key: bytes, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._age(now)
+        if self._current_count >= self.capacity:
+            self.early_rotations += 1
+            self._rotate(now)
+        current = self._current
+        for p in self._positions(key):
+            current[p >> 3] |= 1 << (p & 7)
+        self._current_count += 1
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "checks": self.checks,
+            "rejected": self.rejected,
+            "capacity": self.capacity,
+            "entries": self._current_count,
+            "in_flight": len(self._pending),
+            "hashes": self.hashes,
+            "memory_bytes": 2 * len(self._current),
+            "fp_rate_target": self.fp_rate,
+            "rotations": self.rotations,
+            "early_rotations": self.early_rotations,
+        }
+
+
+def make_duplicate_filter(kind: str, window: float, fp_rate: float, max_bytes: int, max_entries: int):
+    """`kind` is "bloom", "lru" or "off" (None)."""
+    if kind == "bloom":
+        return RotatingBloomFilter(window=window, fp_rate=fp_rate, max_bytes=max_bytes)
+    if kind == "lru":
+        return LruDuplicateFilter(window=window, max_entries=max_entries)
+    if kind == "off":
+        return None
+    raise ValueError(f"Unknown duplicate filter {kind!r}")
@@ -0,0 +1,245 @@
+"""Server-Sent Events feed of new contacts and status checks.
+
+`EventBroker` is an in-process pub/sub. By default the insert handlers publish
+to it directly; with several workers, `ChangeStreamSource` instead publishes
+every insert seen on a MongoDB change stream, so each worker's subscribers see
+all of them. Each subscriber has a bounded queue: one that falls `max_buffer`
+events behind is dropped and its stream ends, and the client reconnects.
+
+The broker numbers events in the order it publishes them and keeps the last
+`history` of them. An event's id names that sequence number (with the broker's
+epoch) and the subscriber's position in every topic it follows, built from the
+keyset cursors used for pagination. On reconnect to the same worker, everything
+after the sequence number is resent from the history: exact, and independent of
+the timestamps the documents carry. Otherwise (another worker, a restart, or a
+gap longer than the history) everything from `replay_lag` before those
+positions is replayed from MongoDB, so inserts whose timestamps were taken
+before an earlier-stamped insert finished, or on a worker with a skewed clock,
+are not missed; events within the lag may be sent twice.
+"""
+import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from pymongo.errors import PyMongoError
+
+from pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[datetime, str]
+# (broker epoch, sequence number)
+Resume = Tuple[str, int]
+
+
+class EventTopic(NamedTuple):
+    # Collection field events are ordered by (with "id" as tie-breaker)
+    time_field: str
+    # A read-path serializer (see serializers.py): its projection and dump_line
+    serializer: object
+
+
+class Event(NamedTuple):
+    topic: str
+    position: Position
+    data: bytes
+    # Assigned by EventBroker.publish; 0 for events replayed from MongoDB
+    seq: int = 0
+
+
+def make_event(topic: str, doc: dict, spec: EventTopic) -> Event:
+    doc = {key: value for key, value in doc.items() if key != "_id"}
+    # MongoDB stores milliseconds; positions must compare the same before and after a round trip
+    timestamp = doc[spec.time_field]
+    timestamp = timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)
+    return Event(topic, (timestamp, doc["id"]), spec.serializer.dump_line(doc))
+
+
+def encode_last_event_id(positions: Dict[str, Position], resume: Optional[Resume] = None) -> str:
+    parts = [f"{topic}:{encode_cursor(*position)}" for topic, position in sorted(positions.items())]
+    if resume is not None:
+        parts.insert(0, f"{resume[0]}-{resume[1]}")
+    return ".".join(parts)
+
+
+def decode_last_event_id(value: str) -> Tuple[Optional[Resume], Dict[str, Position]]:
+    """Inverse of encode_last_event_id. Raises ValueError when malformed."""
+    parts = value.split(".")
+    resume = None
+    if parts and ":" not in parts[0]:
+        epoch, sep, seq = parts.pop(0).partition("-")
+        if not sep or not seq.isdigit():
+            raise ValueError(f"Invalid Last-Event-ID: {value!r}")
+        resume = (epoch, int(seq))
+    positions = {}
+    for part in parts:
+        topic, sep, cursor = part.partition(":")
+        if not sep:
+            raise ValueError(f"Invalid Last-Event-ID: {value!r}")
+        positions[topic] = decode_cursor(cursor)
+    return resume, positions
+
+
+def format_event(event: Event, positions: Dict[str, Position], resume: Optional[Resume] = None) -> bytes:
+    return (f"id: {encode_last_event_id(positions, resume)}\nevent: {event.topic}\n".encode()
+            + b"data: " + event.data + b"\n\n")
+
+
+class Subscription:
+    def __init__(self, topics: Iterable[str], max_buffer: int):
+        self.topics = frozenset(topics)
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(max_buffer)
+        self.dropped = False
+
+
+class EventBroker:
+    def __init__(self, max_buffer: int = 256, history: int = 1024):
+        self.max_buffer = max_buffer
+        # Tells this broker's sequence numbers apart from another worker's or a previous run's
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self._history: Deque[Event] = deque(maxlen=history)
+        self._subscriptions: Set[Subscription] = set()
+        self.published = 0
+        self.delivered = 0
+        self.dropped_subscribers = 0
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        subscription = Subscription(topics, self.max_buffer)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def since(self, resume: Resume) -> Optional[List[Event]]:
+        """Events published after `resume`, or None when they are not all in the history."""
+        epoch, seq = resume
+        if epoch != self.epoch or seq > self.seq:
+            return None
+        if seq < self.seq and (not self._history or self._history[0].seq > seq + 1):
+            return None
+        return [event for event in self._history if event.seq > seq]
+
+    def publish(self, event: Event) -> None:
+        """Hand `event` to every subscriber of its topic without waiting on any."""
+        self.seq += 1
+        event = event._replace(seq=self.seq)
+        self._history.append(event)
+        self.published += 1
+        for subscription in list(self._subscriptions):
+            if event.topic not in subscription.topics:
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                subscription.dropped = True
+                self._subscriptions.discard(subscription)
+                self.dropped_subscribers += 1
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscriptions),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped_subscribers,
+            "max_buffer": self.max_buffer,
+            "history": len(self._history),
+        }
+
+
+async def event_stream(broker: EventBroker, topics: List[str], positions: Dict[str, Position],
+                       replay: Callable[[str, Position], AsyncIterator[Event]],
+                       heartbeat: float = 15.0, resume: Optional[Resume] = None,
+                       replay_lag: float = 0.0) -> AsyncIterator[bytes]:
+    """SSE body: what followed `resume` (from the broker history) or `positions`
+    (from MongoDB), then live events until dropped."""
+    # Subscribe before catching up so nothing published meanwhile is lost; the
+    # overlap is skipped below.
+    subscription = broker.subscribe(topics)
+    try:
+        yield b"retry: 3000\n\n"
+        missed = broker.since(resume) if resume is not None else None
+        # Live events up to this sequence number were resent from the history
+        caught_up = broker.seq if missed is not None else 0
+        # Live events also delivered by the MongoDB replay
+        replayed: Set[Tuple[str, str]] = set()
+        if missed is not None:
+            for event in missed:
+                if event.topic in subscription.topics:
+                    positions[event.topic] = max(positions.get(event.topic, event.position), event.position)
+                    yield format_event(event, positions, (broker.epoch, event.seq))
+        else:
+            lag = timedelta(seconds=replay_lag)
+            for topic in topics:
+                if topic in positions:
+                    timestamp, doc_id = positions[topic]
+                    after = (timestamp - lag, "") if lag else (timestamp, doc_id)
+                    async for event in replay(topic, after):
+                        replayed.add((topic, event.position[1]))
+                        positions[topic] = max(positions[topic], event.position)
+                        yield format_event(event, positions)
+        while not subscription.dropped:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if event.seq <= caught_up:
+                continue
+            if replayed and (event.topic, event.position[1]) in replayed:
+                replayed.discard((event.topic, event.position[1]))
+                continue
+            positions[event.topic] = max(positions.get(event.topic, event.position), event.position)
+            yield format_event(event, positions, (broker.epoch, event.seq))
+    finally:
+        broker.unsubscribe(subscription)
+
+
+class ChangeStreamSource:
+    """Publishes inserts into the topic collections from a MongoDB change stream
+    (requires a replica set), resuming after errors from the last token seen."""
+
+    def __init__(self, db, broker: EventBroker, topics: Dict[str, EventTopic], max_backoff: float = 60.0):
+        self.db = db
+        self.broker = broker
+        self.topics = topics
+        self.max_backoff = max_backoff
+        self.resume_token = None
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        pipeline = [{"$match": {"operationType": "insert", "ns.coll": {"$in": list(self.topics)}}}]
+        while True:
+            try:
+                async with self.db.watch(pipeline, resume_after=self.resume_token) as stream:
+                    async for change in stream:
+                        self.failures = 0
+                        self.resume_token = stream.resume_token
+                        topic = change["ns"]["coll"]
+                        self.broker.publish(make_event(topic, change["fullDocument"], self.topics[topic]))
+            except PyMongoError as e:
+                self.failures += 1
+                self.last_error = str(e)
+                delay = min(self.max_backoff, 2 ** self.failures)
+                logger.error("Change stream failed, retrying in %ss: %s", delay, e)
+                await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,89 @@
+"""Streaming CSV/NDJSON export, gzip-compressed on the fly.
+
+Documents are pulled from the Motor cursor in batches of `batch_size`, encoded
+and pushed through one zlib compressor, so at any time only one batch of
+documents and its compressed output are held in memory, however large the
+collection is.
+"""
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+import orjson
+
+from pagination import NDJSON_MEDIA_TYPE
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class CsvEncoder:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, fields: List[str]):
+        self.fields = fields
+
+    def header(self) -> bytes:
+        return self._rows([self.fields])
+
+    def encode(self, docs: List[dict]) -> bytes:
+        fields = self.fields
+        return self._rows([_cell(doc.get(field)) for field in fields] for doc in docs)
+
+    @staticmethod
+    def _rows(rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+
+class NdjsonEncoder:
+    media_type = NDJSON_MEDIA_TYPE
+    extension = "ndjson"
+
+    def __init__(self, fields: List[str]):
+        self.fields = fields
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, docs: List[dict]) -> bytes:
+        return b"".join(orjson.dumps(doc) + b"\n" for doc in docs)
+
+
+ENCODERS = {"csv": CsvEncoder, "ndjson": NdjsonEncoder}
+
+
+async def stream_export(cursor, encoder, batch_size: int = 1000,
+                        gzip_level: Optional[int] = 6) -> AsyncIterator[bytes]:
+    """Yield the encoded (and, unless `gzip_level` is None, gzipped) export."""
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31) if gzip_level is not None else None
+
+    def output(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor is not None else data
+
+    chunk = output(encoder.header())
+    if chunk:
+        yield chunk
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            chunk = output(encoder.encode(batch))
+            batch.clear()
+            if chunk:
+                yield chunk
+    chunk = output(encoder.encode(batch)) if batch else b""
+    if compressor is not None:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
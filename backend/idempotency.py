@@ -0,0 +1,297 @@
+"""Idempotency-Key support for POST endpoints.
+
+The first request carrying a key runs normally and its response is stored: in
+an in-process LRU for fast replays and in the TTL-indexed `idempotency_keys`
+collection so every worker replays it too. Later requests with the same key get
+the stored response without reaching the route, so they neither write again
+nor count against the rate limit. Concurrent requests with one key are
+collapsed: within a process they wait on the first request, across processes
+the first to insert the pending record runs and the others poll for its
+result. Reusing a key with a different body is rejected with 422.
+
+Responses are stored unless they are 5xx or 429, so a failed or rate-limited
+request can be retried with the same key.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from starlette.datastructures import Headers
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status: int
+    content_type: str
+    body: bytes
+
+
+class IdempotencyConflict(Exception):
+    """The key is already bound to a different request body."""
+
+
+class IdempotencyInProgress(Exception):
+    """Another worker is still running the request for this key."""
+
+
+def _json_error(status: int, detail: str) -> Tuple[int, bytes]:
+    return status, b'{"detail":"' + detail.encode() + b'"}'
+
+
+class IdempotencyStore:
+    def __init__(self, get_collection: Callable, ttl: float = 86400.0, max_entries: int = 10000,
+                 lock_timeout: float = 30.0, poll_interval: float = 0.05):
+        self.get_collection = get_collection
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._entries: "OrderedDict[str, Tuple[StoredResponse, float]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.executed = 0
+        self.replayed = 0
+        self.collapsed = 0
+        self.conflicts = 0
+
+    def _get_local(self, key: str) -> Optional[StoredResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _put_local(self, key: str, stored: StoredResponse) -> None:
+        self._entries[key] = (stored, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _from_record(record: dict) -> StoredResponse:
+        response = record["response"]
+        return StoredResponse(record["request_hash"], response["status"], response["content_type"],
+                              bytes(response["body"]))
+
+    async def _claim(self, key: str, request_hash: str) -> Optional[StoredResponse]:
+        """Insert the pending record, or wait for whoever holds it. Returns the
+        stored response when another worker finished the request first."""
+        collection = self.get_collection()
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            now = datetime.utcnow()
+            try:
+                await collection.insert_one({
+                    "_id": key, "request_hash": request_hash, "state": "pending",
+                    "locked_until": now + timedelta(seconds=self.lock_timeout),
+                    "expires_at": now + timedelta(seconds=self.ttl),
+                })
+                return None
+            except DuplicateKeyError:
+                pass
+            record = await collection.find_one({"_id": key})
+            if record is None:
+                continue
+            if record["request_hash"] != request_hash:
+                raise IdempotencyConflict()
+            if record["state"] == "done":
+                return self._from_record(record)
+            if record["locked_until"] <= now:
+                # The worker holding the key went away; take it over.
+                taken = await collection.find_one_and_update(
+                    {"_id": key, "state": "pending", "locked_until": record["locked_until"]},
+                    {"$set": {"locked_until": now + timedelta(seconds=self.lock_timeout)}},
+                    return_document=ReturnDocument.AFTER,
+                )
+                if taken is not None:
+                    return None
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgress()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _finish(self, key: str, stored: Optional[StoredResponse]) -> None:
+        collection = self.get_collection()
+        if stored is None:
+            await collection.delete_one({"_id": key, "state": "pending"})
+            return
+        await collection.update_one({"_id": key}, {
+            "$set": {"state": "done", "response": {
+                "status": stored.status, "content_type": stored.content_type, "body": stored.body,
+            }},
+            "$unset": {"locked_until": ""},
+        })
+
+    async def run(self, key: str, request_hash: str, execute) -> Tuple[StoredResponse, bool]:
+        """Return (response, replayed) for `key`, calling `execute()` only when no
+        response is stored or being produced for it."""
+        stored = self._get_local(key)
+        if stored is None:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.collapsed += 1
+                stored = await asyncio.shield(future)
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                self.conflicts += 1
+                raise IdempotencyConflict()
+            self.replayed += 1
+            return stored, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self._run_claimed(key, request_hash, execute)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; do not warn about an unretrieved exception here.
+            future.exception()
+            raise
+        else:
+            future.set_result(result[0])
+            return result
+        finally:
+            del self._in_flight[key]
+
+    async def _run_claimed(self, key: str, request_hash: str, execute) -> Tuple[StoredResponse, bool]:
+        shared = True
+        try:
+            stored = await self._claim(key, request_hash)
+        except IdempotencyConflict:
+            self.conflicts += 1
+            raise
+        except PyMongoError as e:
+            logger.warning("Idempotency store unavailable, deduplicating in-process only: %s", e)
+            shared, stored = False, None
+        if stored is not None:
+            self._put_local(key, stored)
+            self.replayed += 1
+            return stored, True
+
+        try:
+            status, content_type, body = await execute()
+        except BaseException:
+            if shared:
+                await self._release(key, None)
+            raise
+        self.executed += 1
+        stored = StoredResponse(request_hash, status, content_type, body)
+        keep = status < 500 and status != 429
+        if keep:
+            self._put_local(key, stored)
+        if shared:
+            await self._release(key, stored if keep else None)
+        return stored, False
+
+    async def _release(self, key: str, stored: Optional[StoredResponse]) -> None:
+        try:
+            await self._finish(key, stored)
+        except PyMongoError as e:
+            logger.warning("Could not record idempotency key: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "collapsed": self.collapsed,
+            "conflicts": self.conflicts,
+        }
+
+
+class IdempotencyMiddleware:
+    """Applies an IdempotencyStore to requests carrying an Idempotency-Key header
+    on the given (method, path) routes."""
+
+    def __init__(self, app, store: IdempotencyStore, routes: Iterable[Tuple[str, str]]):
+        self.app = app
+        self.store = store
+        self.routes = frozenset(routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        key = Headers(scope=scope).get("idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await self._send(send, *_json_error(400, "Invalid Idempotency-Key"), replayed=False)
+            return
+
+        chunks: List[bytes] = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        async def execute():
+            return await self._execute(scope, body)
+
+        try:
+            stored, replayed = await self.store.run(
+                f"{scope['method']} {scope['path']} {key}", hashlib.blake2b(body, digest_size=16).hexdigest(),
+                execute,
+            )
+        except IdempotencyConflict:
+            await self._send(send, *_json_error(422, "Idempotency-Key was used with a different request"),
+                             replayed=False)
+            return
+        except IdempotencyInProgress:
+            await self._send(send, *_json_error(409, "A request with this Idempotency-Key is in progress"),
+                             replayed=False)
+            return
+        await self._send(send, stored.status, stored.body, replayed=replayed, content_type=stored.content_type)
+
+    async def _execute(self, scope, body: bytes) -> Tuple[int, str, bytes]:
+        """Run the app on the buffered request and capture its response."""
+        sent = False
+        response = {"status": 500, "content_type": "", "body": []}
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Nothing more to read; wait like a client that stays connected.
+            await asyncio.Event().wait()
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = Headers(raw=message["headers"]).get("content-type", "")
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        return response["status"], response["content_type"], b"".join(response["body"])
+
+    @staticmethod
+    async def _send(send, status: int, body: bytes, replayed: bool,
+                    content_type: str = "application/json") -> None:
+        headers = [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+        if replayed:
+            headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
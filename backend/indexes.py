@@ -0,0 +1,74 @@
+"""MongoDB index declarations for the API collections and an explain-plan check."""
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+logger = logging.getLogger(__name__)
+
+# Every index a route relies on, keyed by collection name.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "contacts": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="status_created_at"),
+        IndexModel([("email", ASCENDING), ("created_at", DESCENDING)], name="email_created_at"),
+        IndexModel([("name", TEXT), ("message", TEXT)], name="name_message_text",
+                   weights={"name": 5, "message": 1}, default_language="english"),
+    ],
+    "status_checks": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("timestamp", ASCENDING), ("id", ASCENDING)], name="timestamp_id"),
+    ],
+    "status_rollups": [
+        IndexModel([("granularity", ASCENDING), ("client_name", ASCENDING), ("bucket", ASCENDING)],
+                   name="granularity_client_bucket", unique=True),
+        IndexModel([("granularity", ASCENDING), ("bucket", ASCENDING), ("client_name", ASCENDING)],
+                   name="granularity_bucket_client"),
+    ],
+    "idempotency_keys": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# (collection, filter, sort) for each read query a route issues, used by the explain check.
+ROUTE_QUERIES: List[Tuple[str, dict, list]] = [
+    ("status_checks", {}, [("timestamp", ASCENDING), ("id", ASCENDING)]),
+    ("contacts", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("status_rollups", {"granularity": "hour", "bucket": {"$gte": datetime(2025, 1, 1)}},
+     [("bucket", ASCENDING), ("client_name", ASCENDING)]),
+    ("status_rollups", {"granularity": "hour", "client_name": "web", "bucket": {"$gte": datetime(2025, 1, 1)}},
+     [("bucket", ASCENDING), ("client_name", ASCENDING)]),
+]
+
+
+async def ensure_indexes(db) -> None:
+    """Create any missing indexes. Safe to call on every startup."""
+    for collection, models in INDEXES.items():
+        names = await db[collection].create_indexes(models)
+        logger.info("Ensured indexes on %s: %s", collection, ", ".join(names))
+
+
+def plan_stages(plan: dict) -> Iterator[str]:
+    """Yield every stage name in an explain() winning plan tree."""
+    stage = plan.get("stage")
+    if stage:
+        yield stage
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            yield from plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+
+async def find_collscans(db, queries: Optional[List[Tuple[str, dict, list]]] = None) -> List[Tuple[str, dict, list]]:
+    """Return the queries (ROUTE_QUERIES by default) whose winning plan contains a COLLSCAN."""
+    offenders = []
+    for collection, query, sort in ROUTE_QUERIES if queries is None else queries:
+        explain = await db[collection].find(query).sort(sort).limit(1).explain()
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in plan_stages(winning_plan):
+            offenders.append((collection, query, sort))
+    return offenders
@@ -0,0 +1,199 @@
+"""Queue-based JSON logging that keeps handler I/O off the event loop.
+
+Log calls only format the message and put the record on a queue; a
+QueueListener thread does the JSON encoding and the stream writes. Records pick
+up the current request id and route from context variables set by
+RequestContextMiddleware, and repeated warnings/errors are sampled so a flood of
+identical failures cannot swamp the pipeline.
+"""
+import contextvars
+import copy
+import json
+import logging
+import queue
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+# The ASGI scope of the current request; routing fills in scope["route"] before the endpoint runs.
+scope_var: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("scope", default=None)
+
+# Attributes copied into the JSON document when present on a record.
+STRUCTURED_FIELDS = ("request_id", "route", "method", "status", "latency_ms", "suppressed")
+
+
+def route_template(scope: Optional[dict]) -> Optional[str]:
+    route = scope.get("route") if scope else None
+    return route.path if route is not None else None
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request id and route to every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        if getattr(record, "route", None) is None:
+            record.route = route_template(scope_var.get())
+        return True
+
+
+class RepeatSampler(logging.Filter):
+    """Let through at most `burst` records per `window` seconds for each distinct
+    (logger, level, message template) at or above `level`. The first record after
+    a suppressed stretch carries a `suppressed` count."""
+
+    def __init__(self, burst: int = 5, window: float = 10.0, level: int = logging.WARNING,
+                 max_keys: int = 1000):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.level = level
+        self.max_keys = max_keys
+        self.total_suppressed = 0
+        self._seen: Dict[Tuple[str, int, str], List] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        state = self._seen.get(key)
+        if state is None or now - state[0] >= self.window:
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            suppressed = state[2] if state else 0
+            self._seen[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if state[1] < self.burst:
+            state[1] += 1
+            return True
+        state[2] += 1
+        self.total_suppressed += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                document[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document["exception"] = record.exc_text
+        return json.dumps(document, default=str)
+
+
+class ContextQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback as `exc_text` instead of folding it
+    into the message, so the formatter on the listener thread can structure it."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+        record = copy.copy(record)
+        record.msg, record.args = message, None
+        record.exc_info, record.exc_text = None, exc_text
+        return record
+
+
+class LogPipeline:
+    """Swaps the root logger's handlers for a queue while running."""
+
+    def __init__(self, level: str = "INFO", json_format: bool = True, stream=None,
+                 sampler: Optional[RepeatSampler] = None):
+        self.level = level
+        self.json_format = json_format
+        self.stream = stream
+        self.sampler = sampler or RepeatSampler()
+        self._listener: Optional[QueueListener] = None
+        self._previous_handlers: List[logging.Handler] = []
+
+    def start(self) -> None:
+        if self._listener is not None:
+            return
+        output = logging.StreamHandler(self.stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if self.json_format else logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ))
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        handler = ContextQueueHandler(log_queue)
+        handler.addFilter(self.sampler)
+        handler.addFilter(RequestContextFilter())
+
+        root = logging.getLogger()
+        self._previous_handlers = root.handlers[:]
+        root.handlers = [handler]
+        root.setLevel(self.level)
+        self._listener = QueueListener(log_queue, output, respect_handler_level=True)
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Drain the queue and put the original handlers back."""
+        if self._listener is None:
+            return
+        self._listener.stop()
+        self._listener = None
+        logging.getLogger().handlers = self._previous_handlers
+
+
+class RequestContextMiddleware:
+    """ASGI middleware assigning each request an id (honouring X-Request-ID),
+    exposing it to log records, echoing it back, and logging one access record
+    with the route template and latency."""
+
+    def __init__(self, app, logger_name: str = "access"):
+        self.app = app
+        self.logger = logging.getLogger(logger_name)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        request_token = request_id_var.set(request_id)
+        scope_token = scope_var.set(scope)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self.logger.isEnabledFor(logging.INFO):
+                route_path = route_template(scope) or "unmatched"
+                self.logger.info(
+                    "%s %s %s", scope["method"], route_path, status,
+                    extra={"route": route_path, "method": scope["method"], "status": status,
+                           "latency_ms": round((time.perf_counter() - start) * 1000, 3)},
+                )
+            scope_var.reset(scope_token)
+            request_id_var.reset(request_token)
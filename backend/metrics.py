@@ -0,0 +1,153 @@
+"""Request and MongoDB command metrics rendered in the Prometheus text format."""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+from pymongo import monitoring
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds, from sub-millisecond cache hits to slow scans.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram. Safe to observe from Motor's worker threads."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+    def render(self, name: str, labels: str) -> list:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self.request_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+        self.in_flight = 0
+        self.mongo_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.mongo_failures: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, table: dict, key: tuple) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(key, Histogram())
+        return histogram
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        self._histogram(self.request_latency, (method, route)).observe(seconds)
+        key = (method, route, status)
+        self.responses[key] = self.responses.get(key, 0) + 1
+
+    def observe_mongo(self, collection: str, command: str, seconds: float, failed: bool = False) -> None:
+        self._histogram(self.mongo_latency, (collection, command)).observe(seconds)
+        if failed:
+            with self._lock:
+                self.mongo_failures[(collection, command)] = self.mongo_failures.get((collection, command), 0) + 1
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.request_latency.items()):
+            lines += histogram.render("http_request_duration_seconds", f'method="{method}",route="{route}"')
+        lines += ["# HELP http_responses_total Responses by route and status.",
+                  "# TYPE http_responses_total counter"]
+        for (method, route, status), count in sorted(self.responses.items()):
+            lines.append(f'http_responses_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+        lines += ["# HELP http_requests_in_flight Requests currently being handled.",
+                  "# TYPE http_requests_in_flight gauge",
+                  f"http_requests_in_flight {self.in_flight}",
+                  "# HELP mongodb_command_duration_seconds MongoDB command latency by collection.",
+                  "# TYPE mongodb_command_duration_seconds histogram"]
+        for (collection, command), histogram in sorted(self.mongo_latency.items()):
+            lines += histogram.render("mongodb_command_duration_seconds",
+                                      f'collection="{collection}",command="{command}"')
+        lines += ["# HELP mongodb_command_failures_total Failed MongoDB commands by collection.",
+                  "# TYPE mongodb_command_failures_total counter"]
+        for (collection, command), count in sorted(self.mongo_failures.items()):
+            lines.append(f'mongodb_command_failures_total{{collection="{collection}",command="{command}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request against its route template."""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_flight -= 1
+            route = scope.get("route")
+            self.metrics.observe_request(
+                scope["method"], route.path if route is not None else "unmatched",
+                status, time.perf_counter() - start,
+            )
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """pymongo command listener feeding per-collection timings into Metrics."""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+        self._collections: Dict[Tuple[object, int], str] = {}
+
+    def started(self, event):
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        else:
+            collection = event.command.get(event.command_name)
+        if isinstance(collection, str):
+            self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, failed: bool):
+        collection = self._collections.pop((event.connection_id, event.request_id), None)
+        if collection is not None:
+            self.metrics.observe_mongo(collection, event.command_name, event.duration_micros / 1e6, failed)
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
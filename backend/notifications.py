@@ -0,0 +1,232 @@
+"""Out-of-band email digests for new contact submissions.
+
+`submit_contact` only calls `ContactNotifier.notify()`, which sets an event. A
+background task then waits `digest_delay` seconds to collect a batch, mails one
+digest for every contact past its checkpoint, and only then advances the
+checkpoint stored in the `notification_state` collection. A failed send leaves
+the checkpoint where it was and is retried with exponential backoff, and a
+restarted process resumes from the stored checkpoint, so no contact is skipped.
+A lease on the state document keeps several workers from sending the same digest.
+"""
+import asyncio
+import logging
+import os
+import random
+import smtplib
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Awaitable, Callable, List, NamedTuple, Optional
+
+from pymongo import ASCENDING, ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = "contact_digest"
+
+
+class SmtpSettings(NamedTuple):
+    host: str
+    port: int
+    username: Optional[str]
+    password: Optional[str]
+    starttls: bool
+    sender: str
+    recipient: str
+    timeout: float = 10.0
+
+
+def smtp_settings_from_env() -> Optional[SmtpSettings]:
+    """Settings from SMTP_* / NOTIFY_EMAIL_* variables; None (disabled) without NOTIFY_EMAIL_TO."""
+    recipient = os.environ.get('NOTIFY_EMAIL_TO')
+    if not recipient:
+        return None
+    return SmtpSettings(
+        host=os.environ.get('SMTP_HOST', 'localhost'),
+        port=int(os.environ.get('SMTP_PORT', '25')),
+        username=os.environ.get('SMTP_USERNAME'),
+        password=os.environ.get('SMTP_PASSWORD'),
+        starttls=os.environ.get('SMTP_STARTTLS', 'false').lower() == 'true',
+        sender=os.environ.get('NOTIFY_EMAIL_FROM', 'portfolio@localhost'),
+        recipient=recipient,
+    )
+
+
+class SmtpSender:
+    """Sends a message with smtplib on a worker thread."""
+
+    def __init__(self, settings: SmtpSettings):
+        self.settings = settings
+
+    def _send(self, message: EmailMessage) -> None:
+        settings = self.settings
+        with smtplib.SMTP(settings.host, settings.port, timeout=settings.timeout) as smtp:
+            if settings.starttls:
+                smtp.starttls()
+            if settings.username:
+                smtp.login(settings.username, settings.password or "")
+            smtp.send_message(message)
+
+    async def __call__(self, message: EmailMessage) -> None:
+        await asyncio.to_thread(self._send, message)
+
+
+PENDING_SORT = [("created_at", ASCENDING), ("id", ASCENDING)]
+
+
+def pending_query(checkpoint_at: datetime, checkpoint_id: str, settled_before: datetime) -> dict:
+    """Contacts after the (created_at, id) checkpoint that were created by `settled_before`."""
+    return {"$and": [
+        {"created_at": {"$lte": settled_before}},
+        {"$or": [{"created_at": {"$gt": checkpoint_at}},
+                 {"created_at": checkpoint_at, "id": {"$gt": checkpoint_id}}]},
+    ]}
+
+
+def build_digest(contacts: List[dict], sender: str, recipient: str) -> EmailMessage:
+    message = EmailMessage()
+    count = len(contacts)
+    message["Subject"] = f"{count} new portfolio contact{'s' if count != 1 else ''}"
+    message["From"] = sender
+    message["To"] = recipient
+    if count == 1:
+        message["Reply-To"] = contacts[0]["email"]
+    sections = [
+        f"From: {c['name']} <{c['email']}>\nReceived: {c['created_at']:%Y-%m-%d %H:%M} UTC\n\n{c['message']}"
+        for c in contacts
+    ]
+    message.set_content(("\n\n" + "-" * 40 + "\n\n").join(sections) + "\n")
+    return message
+
+
+class ContactNotifier:
+    def __init__(self, db, send: Callable[[EmailMessage], Awaitable[None]], sender: str, recipient: str,
+                 digest_delay: float = 60.0, batch_size: int = 50, settle: float = 5.0,
+                 poll_interval: float = 300.0, base_backoff: float = 2.0, max_backoff: float = 300.0,
+                 lease: float = 120.0):
+        self.db = db
+        self.send = send
+        self.sender = sender
+        self.recipient = recipient
+        self.digest_delay = digest_delay
+        self.batch_size = batch_size
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self.worker_id = uuid.uuid4().hex
+        self.failures = 0
+        self.digests_sent = 0
+        self.contacts_sent = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Called from the insert path; never waits on anything."""
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _acquire_lease(self, now: datetime) -> Optional[dict]:
+        state = self.db.notification_state
+        await state.update_one(
+            {"_id": STATE_ID},
+            {"$setOnInsert": {"checkpoint_at": now, "checkpoint_id": "", "lease_owner": None,
+                              "lease_expires": now}},
+            upsert=True,
+        )
+        return await state.find_one_and_update(
+            {"_id": STATE_ID, "$or": [{"lease_owner": self.worker_id}, {"lease_owner": None},
+                                      {"lease_expires": {"$lte": now}}]},
+            {"$set": {"lease_owner": self.worker_id, "lease_expires": now + timedelta(seconds=self.lease)}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def run_once(self) -> int:
+        """Send one digest for up to `batch_size` pending contacts; returns how many
+        it covered. Raises if sending fails, leaving the checkpoint unchanged."""
+        now = datetime.utcnow()
+        state = await self._acquire_lease(now)
+        if state is None:
+            return 0
+        checkpoint_at, checkpoint_id = state["checkpoint_at"], state["checkpoint_id"]
+        query = pending_query(checkpoint_at, checkpoint_id, now - timedelta(seconds=self.settle))
+        contacts = await (
+            self.db.contacts.find(query, {"_id": 0, "id": 1, "name": 1, "email": 1, "message": 1, "created_at": 1})
+            .sort(PENDING_SORT)
+            .limit(self.batch_size)
+            .to_list(self.batch_size)
+        )
+        if not contacts:
+            return 0
+
+        try:
+            await self.send(build_digest(contacts, self.sender, self.recipient))
+        except Exception as e:
+            await self.db.notification_state.update_one(
+                {"_id": STATE_ID}, {"$inc": {"failures": 1}, "$set": {"last_error": str(e)}}
+            )
+            raise
+
+        last = contacts[-1]
+        await self.db.notification_state.update_one(
+            {"_id": STATE_ID, "lease_owner": self.worker_id},
+            {"$set": {"checkpoint_at": last["created_at"], "checkpoint_id": last["id"],
+                      "last_sent_at": datetime.utcnow(), "last_error": None},
+             "$inc": {"digests_sent": 1, "contacts_sent": len(contacts)}},
+        )
+        self.digests_sent += 1
+        self.contacts_sent += len(contacts)
+        return len(contacts)
+
+    async def _drain(self) -> None:
+        """Send digests until nothing is pending, backing off on failures."""
+        while True:
+            try:
+                sent = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (self.failures - 1))
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning("Contact digest failed (attempt %s), retrying in %.1fs: %s",
+                               self.failures, delay, e)
+                await asyncio.sleep(delay)
+                continue
+            self.failures = 0
+            if sent < self.batch_size:
+                return
+
+    async def _run(self) -> None:
+        # Catch up on anything left over from a previous run first.
+        await asyncio.sleep(self.settle)
+        await self._drain()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                await asyncio.sleep(max(self.digest_delay, self.settle))
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self._drain()
+
+    def stats(self) -> dict:
+        return {
+            "digests_sent": self.digests_sent,
+            "contacts_sent": self.contacts_sent,
+            "consecutive_failures": self.failures,
+            "running": self._task is not None and not self._task.done(),
+        }
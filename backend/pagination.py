@@ -0,0 +1,54 @@
+"""Keyset (cursor) pagination and NDJSON streaming helpers for list endpoints."""
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_cursor(sort_value: datetime, doc_id: str) -> str:
+    """Build an opaque cursor pointing just past the given document."""
+    payload = json.dumps({"t": sort_value.isoformat(), "id": doc_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), str(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset_filter(field: str, cursor: Optional[str], descending: bool) -> dict:
+    """Mongo filter selecting documents strictly after the cursor in (field, id) order."""
+    if not cursor:
+        return {}
+    sort_value, doc_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    return {"$or": [
+        {field: {op: sort_value}},
+        {field: sort_value, "id": {op: doc_id}},
+    ]}
+
+
+def keyset_sort(field: str, descending: bool) -> list:
+    direction = -1 if descending else 1
+    return [(field, direction), ("id", direction)]
+
+
+def next_cursor(docs: list, field: str, limit: int) -> Optional[str]:
+    """Cursor for the page after `docs`, or None when this was the last page."""
+    if not docs or len(docs) < limit:
+        return None
+    last = docs[-1]
+    return encode_cursor(last[field], last["id"])
+
+
+async def stream_ndjson(cursor, serialize: Callable[[dict], bytes]) -> AsyncIterator[bytes]:
+    """Yield one JSON line per document as the Motor cursor produces them."""
+    async for doc in cursor:
+        yield serialize(doc) + b"\n"
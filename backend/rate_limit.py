@@ -0,0 +1,313 @@
+"""Rate limiter storages for slowapi/limits.
+
+Both storages implement the sliding window counter strategy on top of per-window
+counter buckets keyed ``<limit key>/<window index>``:
+
+* ``local://`` keeps the buckets in process memory, bounded to ``max_keys``
+  entries with least-recently-used buckets evicted first.
+* ``mongo-buckets://`` keeps them in a TTL-indexed MongoDB collection updated with
+  an atomic ``$inc``, so every worker shares the same counters and they survive
+  restarts. It allows requests while MongoDB is unreachable.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from math import floor
+from typing import Optional, Tuple
+
+from limits.storage.base import SlidingWindowCounterSupport, Storage, TimestampedSlidingWindow
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_STRATEGY = "sliding-window-counter"
+
+
+class BucketedSlidingWindow(TimestampedSlidingWindow):
+    """Sliding window counter logic shared by the bucket storages. Subclasses
+    provide get/incr/decr/clear/get_expiry for a single bucket key."""
+
+    def _window_info(self, key: str, expiry: int, now: float) -> Tuple[str, int, float, int, float]:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self.get(previous_key)
+        current_count = self.get(current_key)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return current_key, previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        current_key, previous_count, previous_ttl, current_count, _ = self._window_info(key, expiry, time.time())
+        weighted = previous_count * previous_ttl / expiry
+        if floor(weighted + current_count) + amount > limit:
+            return False
+        # A bucket must outlive its own window so it can serve as "previous" for the next one.
+        current_count = self.incr(current_key, 2 * expiry, amount=amount)
+        if floor(weighted + current_count) > limit:
+            # Lost a race with a concurrent hit; give the slot back.
+            self.decr(current_key, amount)
+            return False
+        return True
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        _, previous_count, previous_ttl, current_count, current_ttl = self._window_info(key, expiry, time.time())
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        for bucket_key in self.sliding_window_keys(key, expiry, time.time()):
+            self.clear(bucket_key)
+
+
+class LocalSlidingWindowStorage(Storage, BucketedSlidingWindow, SlidingWindowCounterSupport):
+    """Process-local bucket storage with bounded memory."""
+
+    STORAGE_SCHEME = ["local"]
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False,
+                 max_keys: int = 10000, **options):
+        self.max_keys = int(max_keys)
+        self.evictions = 0
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return ValueError
+
+    def _live_bucket(self, key: str, now: float) -> Optional[list]:
+        bucket = self._buckets.get(key)
+        if bucket is not None and bucket[1] <= now:
+            del self._buckets[key]
+            return None
+        return bucket
+
+    def _evict(self, now: float) -> None:
+        # Drop expired buckets from the idle end, then enforce the size bound.
+        while self._buckets:
+            oldest_key, (_, expires_at) = next(iter(self._buckets.items()))
+            if expires_at > now and len(self._buckets) <= self.max_keys:
+                break
+            del self._buckets[oldest_key]
+            if expires_at > now:
+                self.evictions += 1
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        with self._lock:
+            bucket = self._live_bucket(key, now)
+            if bucket is None:
+                bucket = self._buckets[key] = [0, now + expiry]
+            bucket[0] += amount
+            self._buckets.move_to_end(key)
+            self._evict(now)
+            return bucket[0]
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            bucket = self._live_bucket(key, time.time())
+            if bucket is None:
+                return 0
+            bucket[0] = max(bucket[0] - amount, 0)
+            return bucket[0]
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            bucket = self._live_bucket(key, time.time())
+            return bucket[0] if bucket else 0
+
+    def get_expiry(self, key: str) -> float:
+        with self._lock:
+            bucket = self._live_bucket(key, time.time())
+            return bucket[1] if bucket else time.time()
+
+    def check(self) -> bool:
+        return True
+
+    def reset(self) -> Optional[int]:
+        with self._lock:
+            count = len(self._buckets)
+            self._buckets.clear()
+            return count
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class MongoBucketStorage(Storage, BucketedSlidingWindow, SlidingWindowCounterSupport):
+    """Shared bucket storage in MongoDB.
+
+    A sliding window is one ``{_id, windows: {<window index>: count}, expireAt}``
+    document per limit key, so a hit is a single ``find_one_and_update`` that
+    increments the current window and returns the previous one with it (a second
+    round trip only gives the slot back when the hit is over the limit). Other
+    strategies use ``{_id, count, expireAt}`` bucket documents. A TTL index removes
+    both once they expire.
+
+    limits calls storages synchronously, and slowapi does so on the event loop, so
+    every round trip blocks the worker: the pymongo client uses short timeouts, and
+    when MongoDB is unreachable hits are allowed (fail open) and MongoDB is not
+    tried again for `failure_backoff` seconds. `collection` may be passed directly,
+    e.g. in tests.
+    """
+
+    STORAGE_SCHEME = ["mongo-buckets"]
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False,
+                 mongo_url: Optional[str] = None, database: str = "test_database",
+                 collection_name: str = "rate_limits", collection=None, timeout_ms: int = 250,
+                 failure_backoff: float = 5.0, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._client = None
+        if collection is None:
+            timeout_ms = int(timeout_ms)
+            self._client = MongoClient(
+                mongo_url, connect=False, serverSelectionTimeoutMS=timeout_ms,
+                connectTimeoutMS=timeout_ms, socketTimeoutMS=timeout_ms,
+            )
+            collection = self._client[database][collection_name]
+        self.collection = collection
+        self.failure_backoff = float(failure_backoff)
+        self._indexed = False
+        self._unavailable_until = 0.0
+        self.failed_open = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def base_exceptions(self):
+        return PyMongoError
+
+    def _ensure_index(self) -> None:
+        if not self._indexed:
+            self.collection.create_index("expireAt", expireAfterSeconds=0)
+            self._indexed = True
+
+    def _fail_open(self, error: Optional[Exception] = None) -> bool:
+        self.failed_open += 1
+        if error is not None:
+            self.last_error = str(error)
+            self._unavailable_until = time.monotonic() + self.failure_backoff
+            logger.warning("Rate limit storage unavailable, allowing requests for %ss: %s",
+                           self.failure_backoff, error)
+        return True
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        if time.monotonic() < self._unavailable_until:
+            return self._fail_open()
+        now = time.time()
+        current = int(now / expiry)
+        try:
+            self._ensure_index()
+            doc = self.collection.find_one_and_update(
+                {"_id": key},
+                {
+                    "$inc": {f"windows.{current}": amount},
+                    "$unset": {f"windows.{current - 2}": ""},
+                    # Outlive the window so it can serve as "previous" for the next one
+                    "$set": {"expireAt": datetime.utcnow() + timedelta(seconds=2 * expiry)},
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            windows = doc["windows"]
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+            weighted = windows.get(str(current - 1), 0) * previous_ttl / expiry
+            if floor(weighted + windows[str(current)]) > limit:
+                # Over the limit (or lost a race with a concurrent hit): give the slot back.
+                self.collection.update_one({"_id": key}, {"$inc": {f"windows.{current}": -amount}})
+                return False
+            return True
+        except PyMongoError as e:
+            return self._fail_open(e)
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        now = time.time()
+        current = int(now / expiry)
+        doc = self.collection.find_one({"_id": key}) or {}
+        windows = doc.get("windows", {})
+        previous_count = windows.get(str(current - 1), 0)
+        current_count = windows.get(str(current), 0)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        self.collection.delete_one({"_id": key})
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        self._ensure_index()
+        now = datetime.utcnow()
+        doc = self.collection.find_one_and_update(
+            {"_id": key},
+            {"$inc": {"count": amount}, "$setOnInsert": {"expireAt": now + timedelta(seconds=expiry)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc["expireAt"] <= now:
+            # Expired but not yet reaped by the TTL monitor: restart the bucket,
+            # unless another worker already did.
+            restarted = self.collection.update_one(
+                {"_id": key, "expireAt": doc["expireAt"]},
+                {"$set": {"count": amount, "expireAt": now + timedelta(seconds=expiry)}},
+            )
+            return amount if restarted.modified_count else self.get(key)
+        return doc["count"]
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        doc = self.collection.find_one_and_update(
+            {"_id": key}, {"$inc": {"count": -amount}}, return_document=ReturnDocument.AFTER
+        )
+        return max(doc["count"], 0) if doc else 0
+
+    def _live_doc(self, key: str) -> Optional[dict]:
+        doc = self.collection.find_one({"_id": key})
+        if doc is None or doc["expireAt"] <= datetime.utcnow():
+            return None
+        return doc
+
+    def get(self, key: str) -> int:
+        doc = self._live_doc(key)
+        return doc["count"] if doc else 0
+
+    def get_expiry(self, key: str) -> float:
+        doc = self._live_doc(key)
+        if doc is None:
+            return time.time()
+        return (doc["expireAt"] - datetime(1970, 1, 1)).total_seconds()
+
+    def check(self) -> bool:
+        try:
+            self.collection.database.client.admin.command("ping")
+            return True
+        except PyMongoError:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self.collection.delete_many({}).deleted_count
+
+    def clear(self, key: str) -> None:
+        self.collection.delete_one({"_id": key})
+
+
+def limiter_storage_config(kind: str, mongo_url: Optional[str], database: str, timeout_ms: int = 250) -> dict:
+    """slowapi Limiter keyword arguments for RATE_LIMIT_STORAGE=local|mongo."""
+    if kind == "mongo":
+        return {
+            "storage_uri": "mongo-buckets://",
+            "storage_options": {"mongo_url": mongo_url, "database": database, "timeout_ms": timeout_ms},
+            # Anything the storage does not already fail open on is logged, not a 500
+            "swallow_errors": True,
+        }
+    if kind == "local":
+        return {"storage_uri": "local://", "storage_options": {}}
+    raise ValueError(f"Unknown rate limit storage: {kind!r}")
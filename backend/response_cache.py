@@ -0,0 +1,104 @@
+"""In-process TTL/LRU cache of serialized list responses with ETag revalidation."""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Response
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+    expires_at: float
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ResponseCache:
+    """Maps (namespace, generation, params) to a serialized response body.
+
+    Writers call `invalidate(namespace)`, which bumps the namespace generation so
+    older entries are never served again and age out of the LRU. Because a reader
+    builds its key before querying the database, a body computed from data that
+    was invalidated mid-request is stored under the stale generation and never hit.
+    A `ttl` of 0 disables caching. The LRU is bounded both by `max_entries` and by
+    `max_bytes` of cached bodies; a body larger than `max_bytes` is not cached.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def key(self, namespace: str, *params) -> Tuple:
+        return (namespace, self._generations.get(namespace, 0)) + params
+
+    def get(self, key: Tuple) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+                self.size -= len(entry.body)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Tuple, body: bytes, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        entry = CachedResponse(body, make_etag(body), headers or {}, time.monotonic() + self.ttl)
+        if self.ttl > 0 and len(body) <= self.max_bytes:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self._entries[key] = entry
+            self.size += len(body)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+        return entry
+
+    def invalidate(self, namespace: str) -> None:
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+        self.size = 0
+
+    def to_response(self, entry: CachedResponse, if_none_match: Optional[str]) -> Response:
+        """A 304 when the client already has this body, otherwise the body itself."""
+        headers = {"ETag": entry.etag, **entry.headers}
+        if etag_matches(if_none_match, entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
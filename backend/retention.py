@@ -0,0 +1,235 @@
+"""Retention for status_checks and contacts: archive expired documents, then delete them.
+
+Each `RetentionPolicy` names a collection, its timestamp field, how long documents
+are kept and which documents may be removed at all (contacts only once
+"replied"). The archival job streams expired documents into gzip-compressed
+NDJSON segments under the archive directory and deletes a segment's documents in
+batches only after the segment file is fsynced and renamed into place. A TTL
+index on the same field and filter, expiring `grace` after the retention period,
+is the backstop should the job stop running.
+
+Run the job on one worker per database: archives are written to local disk.
+"""
+import asyncio
+import gzip
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import bson
+import orjson
+from pymongo import ASCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy(NamedTuple):
+    collection: str
+    field: str
+    retention: Optional[timedelta]
+    # Extra condition a document must meet before it may be removed
+    removable: dict = {}
+
+    @property
+    def ttl_index_name(self) -> str:
+        return f"{self.field}_ttl"
+
+
+def _days(name: str) -> Optional[timedelta]:
+    days = float(os.environ.get(name, '0'))
+    return timedelta(days=days) if days > 0 else None
+
+
+def policies_from_env() -> List[RetentionPolicy]:
+    """RETENTION_STATUS_CHECKS_DAYS and RETENTION_CONTACTS_DAYS; 0 keeps everything."""
+    return [
+        RetentionPolicy("status_checks", "timestamp", _days('RETENTION_STATUS_CHECKS_DAYS')),
+        RetentionPolicy("contacts", "created_at", _days('RETENTION_CONTACTS_DAYS'), {"status": "replied"}),
+    ]
+
+
+async def ensure_ttl_indexes(db, policies: List[RetentionPolicy], grace: timedelta) -> None:
+    """Create, retune (collMod) or drop each policy's TTL index to match its retention."""
+    for policy in policies:
+        collection = db[policy.collection]
+        existing = (await collection.index_information()).get(policy.ttl_index_name)
+        if policy.retention is None:
+            if existing is not None:
+                await collection.drop_index(policy.ttl_index_name)
+                logger.info("Dropped TTL index on %s", policy.collection)
+            continue
+        expire_after = int((policy.retention + grace).total_seconds())
+        if existing is None:
+            options = {"partialFilterExpression": policy.removable} if policy.removable else {}
+            await collection.create_indexes([IndexModel(
+                [(policy.field, ASCENDING)], name=policy.ttl_index_name, expireAfterSeconds=expire_after, **options
+            )])
+        elif existing.get("expireAfterSeconds") != expire_after:
+            await db.command("collMod", policy.collection,
+                             index={"name": policy.ttl_index_name, "expireAfterSeconds": expire_after})
+        logger.info("TTL on %s.%s: %ss", policy.collection, policy.field, expire_after)
+
+
+class Segment:
+    """One gzip NDJSON archive file, written as `<name>.part` until committed.
+    Neither file may already exist: an archive is never overwritten."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.part_path = path.with_name(path.name + ".part")
+        self._file = gzip.open(self.part_path, "xb")
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+
+    def commit(self) -> int:
+        self._file.close()
+        with open(self.part_path, "rb") as f:
+            os.fsync(f.fileno())
+        # A hard link fails if the target exists, where a rename would replace it
+        os.link(self.part_path, self.path)
+        os.remove(self.part_path)
+        return self.path.stat().st_size
+
+
+def expired_filter(policy: RetentionPolicy, now: datetime) -> dict:
+    return {policy.field: {"$lt": now - policy.retention}, **policy.removable}
+
+
+def archive_sort(policy: RetentionPolicy) -> list:
+    # (field, id) is the order of the keyset pagination indexes
+    return [(policy.field, ASCENDING), ("id", ASCENDING)]
+
+
+async def archive_expired(db, policy: RetentionPolicy, archive_dir: Path, now: Optional[datetime] = None,
+                          batch_size: int = 1000, segment_size: int = 50000) -> Dict:
+    """Archive and delete one policy's expired documents.
+
+    Returns how many documents were archived and deleted, the BSON bytes the
+    deleted documents occupied, and the compressed bytes written to disk.
+    """
+    now = now or datetime.utcnow()
+    report = {"collection": policy.collection, "archived": 0, "deleted": 0,
+              "bytes_reclaimed": 0, "archive_bytes": 0, "segments": []}
+    if policy.retention is None:
+        return report
+    expired = expired_filter(policy, now)
+    directory = archive_dir / policy.collection
+    directory.mkdir(parents=True, exist_ok=True)
+    # Unique per run, so runs started within the same second never share a name
+    run_id = f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    cursor = db[policy.collection].find(expired, batch_size=batch_size).sort(archive_sort(policy))
+    segment: Optional[Segment] = None
+    # BSON size of each document in the open segment, by _id
+    segment_sizes: dict = {}
+    lines: List[bytes] = []
+
+    async def write_lines():
+        await asyncio.to_thread(segment.write, b"".join(lines))
+        lines.clear()
+
+    async def close_segment():
+        nonlocal segment
+        await write_lines()
+        report["archive_bytes"] += await asyncio.to_thread(segment.commit)
+        report["segments"].append(segment.path.name)
+        ids = list(segment_sizes)
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            result = await db[policy.collection].delete_many({"_id": {"$in": batch}, **expired})
+            report["deleted"] += result.deleted_count
+            kept = set()
+            if result.deleted_count < len(batch):
+                # Whatever is still there was modified since it was read: archived, but kept
+                kept = {doc["_id"] async for doc in db[policy.collection].find({"_id": {"$in": batch}}, {"_id": 1})}
+            report["bytes_reclaimed"] += sum(segment_sizes[i] for i in batch if i not in kept)
+        segment = None
+        segment_sizes.clear()
+
+    async for doc in cursor:
+        if segment is None:
+            segment = Segment(directory / f"{policy.collection}-{run_id}-{len(report['segments']):04d}.ndjson.gz")
+        segment_sizes[doc["_id"]] = len(bson.encode(doc))
+        doc.pop("_id")
+        lines.append(orjson.dumps(doc) + b"\n")
+        report["archived"] += 1
+        if len(lines) >= batch_size:
+            await write_lines()
+        if len(segment_sizes) >= segment_size:
+            await close_segment()
+    if segment is not None:
+        await close_segment()
+    return report
+
+
+class RetentionJob:
+    """Runs `archive_expired` for every policy on an interval."""
+
+    def __init__(self, db, policies: List[RetentionPolicy], archive_dir: Path, interval: float = 3600.0,
+                 batch_size: int = 1000, segment_size: int = 50000):
+        self.db = db
+        self.policies = policies
+        self.archive_dir = archive_dir
+        self.interval = interval
+        self.batch_size = batch_size
+        self.segment_size = segment_size
+        self.runs = 0
+        self.totals = {"archived": 0, "deleted": 0, "bytes_reclaimed": 0, "archive_bytes": 0}
+        self.last_run: Optional[List[Dict]] = None
+        self.last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> List[Dict]:
+        async with self._lock:
+            reports = []
+            for policy in self.policies:
+                report = await archive_expired(self.db, policy, self.archive_dir,
+                                               batch_size=self.batch_size, segment_size=self.segment_size)
+                for key in self.totals:
+                    self.totals[key] += report[key]
+                if report["archived"]:
+                    logger.info("Archived %s %s documents into %s segment(s), deleted %s, reclaimed %s bytes",
+                                report["archived"], policy.collection, len(report["segments"]),
+                                report["deleted"], report["bytes_reclaimed"])
+                reports.append(report)
+            self.runs += 1
+            self.last_run = reports
+            return reports
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("Retention run failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "policies": {p.collection: p.retention.total_seconds() if p.retention else None for p in self.policies},
+            "runs": self.runs,
+            **self.totals,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,208 @@
+"""Per-client status check counts in minute, hour and day buckets.
+
+Every status check increments its three buckets in `status_rollups` with
+upserts, so range queries read at most one document per client per bucket no
+matter how many raw checks there are. `RollupRecorder` counts stored checks in
+memory and writes the increments in one unordered bulk per flush, off the
+request path. `backfill` rebuilds the buckets from `status_checks` with an
+aggregation that writes back through `$merge`, for data recorded before rollups
+existed or after a gap (including increments lost when a flush failed).
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "status_rollups"
+
+GRANULARITIES: Dict[str, timedelta] = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity {granularity!r}")
+
+
+def bucket_count(start: datetime, end: datetime, granularity: str) -> int:
+    """Buckets a client can have in [start, end)."""
+    first = bucket_start(start, granularity)
+    return max(0, -(-(end - first) // GRANULARITIES[granularity]))
+
+
+def _update(granularity: str, client_name: str, bucket: datetime,
+            count: int, first_seen: datetime, last_seen: datetime) -> UpdateOne:
+    return UpdateOne(
+        {"granularity": granularity, "client_name": client_name, "bucket": bucket},
+        {"$inc": {"count": count}, "$min": {"first_seen": first_seen}, "$max": {"last_seen": last_seen}},
+        upsert=True,
+    )
+
+
+async def record(collection, client_name: str, timestamp: datetime) -> None:
+    """Count one status check in each of its buckets."""
+    await collection.bulk_write([
+        _update(granularity, client_name, bucket_start(timestamp, granularity), 1, timestamp, timestamp)
+        for granularity in GRANULARITIES
+    ], ordered=False)
+
+
+class RollupRecorder:
+    """Counts status checks in memory and writes the bucket increments at most
+    `max_delay` seconds later, in one unordered bulk_write per flush.
+
+    Feed it only checks that are stored (after the insert, or from the write
+    buffer once their batch is written). Updates rejected by the server are
+    retried with the next flush; when a flush fails without saying which updates
+    were applied they are dropped rather than risk counting twice, and logged so
+    the range can be repaired with `backfill`.
+    """
+
+    def __init__(self, get_collection: Callable, max_delay: float = 1.0):
+        self.get_collection = get_collection
+        self.max_delay = max_delay
+        self._pending: Dict[Tuple[str, str, datetime], list] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.recorded = 0
+        self.flushes = 0
+        self.updates_written = 0
+        self.updates_dropped = 0
+        self.last_error: Optional[str] = None
+
+    def _merge(self, key: Tuple[str, str, datetime], count: int, first_seen: datetime, last_seen: datetime) -> None:
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = [count, first_seen, last_seen]
+        else:
+            entry[0] += count
+            entry[1] = min(entry[1], first_seen)
+            entry[2] = max(entry[2], last_seen)
+
+    def _schedule(self) -> None:
+        if self._timer is None and self._pending:
+            self._timer = asyncio.create_task(self._flush_after_delay())
+
+    def add(self, client_name: str, timestamp: datetime) -> None:
+        for granularity in GRANULARITIES:
+            self._merge((granularity, client_name, bucket_start(timestamp, granularity)), 1, timestamp, timestamp)
+        self.recorded += 1
+        self._schedule()
+
+    def add_many(self, documents: Iterable[dict]) -> None:
+        for doc in documents:
+            self.add(doc["client_name"], doc["timestamp"])
+
+    async def _flush_after_delay(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything counted so far."""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            keys = list(pending)
+            operations = [_update(*key, *pending[key]) for key in keys]
+            self.flushes += 1
+            try:
+                await self.get_collection().bulk_write(operations, ordered=False)
+                self.updates_written += len(operations)
+            except BulkWriteError as e:
+                failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                for index in failed:
+                    self._merge(keys[index], *pending[keys[index]])
+                self.updates_written += len(operations) - len(failed)
+                self.last_error = str(e)
+                logger.warning("%s rollup updates failed, retrying with the next flush: %s", len(failed), e)
+                self._schedule()
+            except PyMongoError as e:
+                self.updates_dropped += len(operations)
+                self.last_error = str(e)
+                first_seen = min(entry[1] for entry in pending.values())
+                last_seen = max(entry[2] for entry in pending.values())
+                logger.error("Dropped %s rollup updates; backfill %s to %s to repair them: %s",
+                             len(operations), first_seen, last_seen, e)
+
+    async def close(self) -> None:
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending_updates": len(self._pending),
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "updates_written": self.updates_written,
+            "updates_dropped": self.updates_dropped,
+            "last_error": self.last_error,
+        }
+
+
+def range_filter(granularity: str, start: datetime, end: datetime, client_name: Optional[str] = None) -> dict:
+    query = {"granularity": granularity, "bucket": {"$gte": bucket_start(start, granularity), "$lt": end}}
+    if client_name is not None:
+        query["client_name"] = client_name
+    return query
+
+
+RANGE_SORT = [("bucket", ASCENDING), ("client_name", ASCENDING)]
+
+
+async def backfill(db, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, int]:
+    """Recompute the buckets covering [start, end) from the raw status checks.
+
+    Buckets are replaced, not incremented, so a backfill can be repeated. Checks
+    written while it runs may be missed by the buckets it replaces; run it again
+    over that range if writes were not quiet. Returns the bucket count per
+    granularity.
+    """
+    written = {}
+    for granularity in GRANULARITIES:
+        match: dict = {}
+        if start is not None:
+            match.setdefault("timestamp", {})["$gte"] = bucket_start(start, granularity)
+        if end is not None:
+            # Widen to whole buckets so a partial bucket is never replaced by a partial count
+            last = bucket_start(end, granularity)
+            if last < end:
+                last += GRANULARITIES[granularity]
+            match.setdefault("timestamp", {})["$lt"] = last
+        pipeline: List[dict] = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"client_name": "$client_name",
+                        "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": granularity}}},
+                "count": {"$sum": 1},
+                "first_seen": {"$min": "$timestamp"},
+                "last_seen": {"$max": "$timestamp"},
+            }},
+            {"$project": {"_id": 0, "granularity": {"$literal": granularity},
+                          "client_name": "$_id.client_name", "bucket": "$_id.bucket",
+                          "count": 1, "first_seen": 1, "last_seen": 1}},
+            {"$merge": {"into": ROLLUP_COLLECTION, "on": ["granularity", "client_name", "bucket"],
+                        "whenMatched": "replace", "whenNotMatched": "insert"}},
+        ]
+        await db.status_checks.aggregate(pipeline).to_list(None)
+        query = {"granularity": granularity}
+        if match:
+            query["bucket"] = match["timestamp"]
+        written[granularity] = await db[ROLLUP_COLLECTION].count_documents(query)
+    return written
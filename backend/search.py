@@ -0,0 +1,55 @@
+"""Query building for contact search: text relevance plus indexed filters."""
+import re
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from pymongo import DESCENDING
+
+TEXT_SCORE = {"$meta": "textScore"}
+
+
+class SearchQuery(NamedTuple):
+    filter: dict
+    sort: list
+    # Extra projection fields (the text score) on top of the serializer's projection
+    projection: dict
+
+
+def build_contact_search(
+    q: Optional[str] = None,
+    status: Optional[str] = None,
+    email: Optional[str] = None,
+    email_domain: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> SearchQuery:
+    """Combine the given filters into one query.
+
+    Every shape lines up with an index: `q` with the name/message text index,
+    `status` (+ date range) with status_created_at, `email`/`email_domain` with
+    email_created_at, and a bare date range with created_at_id. A domain filter
+    is an anchored suffix regex, which MongoDB answers by scanning the email
+    index keys rather than the documents. With `q` results are ranked by text
+    relevance, otherwise newest first.
+    """
+    query: dict = {}
+    if q:
+        query["$text"] = {"$search": q}
+    if status:
+        query["status"] = status
+    if email:
+        query["email"] = email
+    elif email_domain:
+        query["email"] = {"$regex": "@" + re.escape(email_domain.lower().lstrip("@")) + "$"}
+    created_at = {}
+    if created_from:
+        created_at["$gte"] = created_from
+    if created_to:
+        created_at["$lt"] = created_to
+    if created_at:
+        query["created_at"] = created_at
+
+    newest_first = [("created_at", DESCENDING), ("id", DESCENDING)]
+    if q:
+        return SearchQuery(query, [("score", TEXT_SCORE)] + newest_first, {"score": TEXT_SCORE})
+    return SearchQuery(query, newest_first, {})
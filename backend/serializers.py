@@ -0,0 +1,58 @@
+"""Read-path serializers turning MongoDB documents into JSON response bytes.
+
+`ModelSerializer` validates every document through its Pydantic model first.
+`ProjectedSerializer` trusts documents the API wrote itself: it asks MongoDB for
+only the model's fields (no `_id`) and encodes the raw documents with orjson in
+a single pass.
+"""
+import json
+from typing import Iterable, Optional, Type
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+
+def render_json(content) -> bytes:
+    """Serialize exactly as FastAPI's default JSONResponse would."""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class ModelSerializer:
+    name = "model"
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.projection: Optional[dict] = None
+
+    def dump(self, docs: Iterable[dict]) -> bytes:
+        return render_json([self.model(**doc) for doc in docs])
+
+    def dump_line(self, doc: dict) -> bytes:
+        return self.model(**doc).json().encode()
+
+
+class ProjectedSerializer:
+    name = "fast"
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.projection = {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+    def dump(self, docs: Iterable[dict]) -> bytes:
+        return orjson.dumps(list(docs))
+
+    def dump_line(self, doc: dict) -> bytes:
+        return orjson.dumps(doc)
+
+
+SERIALIZERS = {cls.name: cls for cls in (ModelSerializer, ProjectedSerializer)}
+
+
+def make_serializer(name: str, model: Type[BaseModel]):
+    try:
+        return SERIALIZERS[name](model)
+    except KeyError:
+        raise ValueError(f"Unknown serializer {name!r}, expected one of {sorted(SERIALIZERS)}")
@@ -1,32 +1,247 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, Response, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr, validator
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import re
+from compression import CompressedBodyCache, CompressionMiddleware, ResponseCompressor
+from database import MongoConnection
+from dedupe import fingerprint, make_duplicate_filter
+from events import (
+    ChangeStreamSource, EventBroker, EventTopic, decode_last_event_id, event_stream, make_event
+)
+from export import ENCODERS, stream_export
+from idempotency import IDEMPOTENCY_COLLECTION, IdempotencyMiddleware, IdempotencyStore
+from indexes import ensure_indexes
+from log_pipeline import LogPipeline, RequestContextMiddleware
+from metrics import PROMETHEUS_CONTENT_TYPE, Metrics, MetricsMiddleware, MongoCommandTimer
+from notifications import ContactNotifier, SmtpSender, smtp_settings_from_env
+from response_cache import ResponseCache
+from retention import RetentionJob, ensure_ttl_indexes, policies_from_env
+from rollups import RANGE_SORT, ROLLUP_COLLECTION, RollupRecorder, backfill, bucket_count, range_filter
+from search import build_contact_search
+from serializers import make_serializer
+from triage import apply_triage
+from rate_limit import RATE_LIMIT_STRATEGY, limiter_storage_config
+from write_buffer import WriteBuffer
+from pagination import (
+    NDJSON_MEDIA_TYPE, encode_cursor, keyset_filter, keyset_sort, next_cursor, stream_ndjson
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Rate limiter setup
-limiter = Limiter(key_func=get_remote_address)
+# Request and MongoDB command metrics, served on /api/metrics when enabled
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+metrics = Metrics() if METRICS_ENABLED else None
+
+# MongoDB connection. The client is created and warmed up in the app lifespan,
+# so importing this module never touches the network. Pool sizes and timeouts
+# come from the MONGO_* variables read in database.client_options_from_env.
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+db_name = os.environ.get('DB_NAME', 'test_database')
+mongo = MongoConnection(
+    mongo_url, db_name, event_listeners=[MongoCommandTimer(metrics)] if metrics else []
+)
+db = None
+
+# Rate limiter setup. RATE_LIMIT_STORAGE is "local" (per process) or "mongo"
+# (counters shared by every worker through the database above, checked with a
+# blocking call bounded by RATE_LIMIT_MONGO_TIMEOUT_MS).
+limiter = Limiter(
+    key_func=get_remote_address,
+    strategy=RATE_LIMIT_STRATEGY,
+    **limiter_storage_config(
+        os.environ.get('RATE_LIMIT_STORAGE', 'local'), mongo_url, db_name,
+        timeout_ms=int(os.environ.get('RATE_LIMIT_MONGO_TIMEOUT_MS', '250')),
+    ),
+)
+
+# Routes that change or delete stored data (triage, rollup backfill, retention runs)
+# require "Authorization: Bearer <ADMIN_TOKEN>"; without ADMIN_TOKEN they are disabled.
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+# Pagination settings
+MAX_PAGE_SIZE = 1000
+MAX_TRIAGE_BATCH = 10000
+MAX_ROLLUP_BUCKETS = 10000
+MAX_BACKFILL_RANGE = timedelta(days=float(os.environ.get('ROLLUP_BACKFILL_MAX_DAYS', '31')))
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', '500'))
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+EXPORT_GZIP_LEVEL = int(os.environ.get('EXPORT_GZIP_LEVEL', '6'))
+
+# Optional write-behind batching for inserts. WRITE_BUFFER_ACK is "flush" (respond
+# once the batch is written) or "enqueue" (respond as soon as the insert is queued).
+WRITE_BUFFER_ENABLED = os.environ.get('WRITE_BUFFER_ENABLED', 'false').lower() == 'true'
+WRITE_BUFFER_ACK = os.environ.get('WRITE_BUFFER_ACK', 'flush')
+WRITE_BUFFER_MAX_BATCH = int(os.environ.get('WRITE_BUFFER_MAX_BATCH', '100'))
+WRITE_BUFFER_MAX_DELAY_MS = int(os.environ.get('WRITE_BUFFER_MAX_DELAY_MS', '50'))
+write_buffers: Dict[str, WriteBuffer] = {}
+
+# Status check rollups, counted in memory and written every ROLLUP_FLUSH_DELAY_MS
+rollup_recorder = RollupRecorder(
+    lambda: db[ROLLUP_COLLECTION],
+    max_delay=int(os.environ.get('ROLLUP_FLUSH_DELAY_MS', '1000')) / 1000,
+)
+# One backfill at a time: each one aggregates over the raw status checks
+rollup_backfill_lock = asyncio.Lock()
+
+# Serialized list responses, invalidated by the matching POST handlers
+response_cache = ResponseCache(
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', '5')),
+    max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '256')),
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024))),
+)
+
+# Optionally rejects repeated contact submissions with 409 before they reach MongoDB.
+# CONTACT_DEDUPE is "off" (default), "bloom" (fixed memory, tunable false-positive
+# rate, so a rare first message may be rejected) or "lru" (exact).
+duplicate_filter = make_duplicate_filter(
+    os.environ.get('CONTACT_DEDUPE', 'off'),
+    window=float(os.environ.get('CONTACT_DEDUPE_WINDOW_S', '3600')),
+    fp_rate=float(os.environ.get('CONTACT_DEDUPE_FP_RATE', '1e-6')),
+    max_bytes=int(os.environ.get('CONTACT_DEDUPE_MAX_BYTES', str(1 << 20))),
+    max_entries=int(os.environ.get('CONTACT_DEDUPE_MAX_ENTRIES', '10000')),
+)
+
+# gzip/brotli for response bodies of at least COMPRESSION_MIN_SIZE bytes; compressed
+# bodies of cached (strong ETag) responses are kept to skip recompressing them
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+compressor = ResponseCompressor(
+    minimum_size=int(os.environ.get('COMPRESSION_MIN_SIZE', '1024')),
+    gzip_level=int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6')),
+    brotli_quality=int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4')),
+    cache=CompressedBodyCache(int(os.environ.get('COMPRESSION_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))),
+) if COMPRESSION_ENABLED else None
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# New-contact email digests, sent in the background when NOTIFY_EMAIL_TO is set
+notifier: Optional[ContactNotifier] = None
+
+# Idempotency-Key support for the POST endpoints: stored responses are replayed from
+# memory (the newest IDEMPOTENCY_MAX_ENTRIES) or from MongoDB for IDEMPOTENCY_TTL_S
+idempotency_store = IdempotencyStore(
+    lambda: db[IDEMPOTENCY_COLLECTION],
+    ttl=float(os.environ.get('IDEMPOTENCY_TTL_S', '86400')),
+    max_entries=int(os.environ.get('IDEMPOTENCY_MAX_ENTRIES', '10000')),
+)
+
+# Server-Sent Events on /api/events. EVENTS_SOURCE is "local" (published by this
+# worker's handlers) or "change_stream" (every worker's inserts, read from a MongoDB
+# change stream, which needs a replica set). Reconnects are resumed from the last
+# EVENTS_HISTORY events when possible, otherwise replayed from MongoDB starting
+# EVENTS_REPLAY_LAG_S before the last event seen.
+EVENTS_SOURCE = os.environ.get('EVENTS_SOURCE', 'local')
+EVENTS_HEARTBEAT_S = float(os.environ.get('EVENTS_HEARTBEAT_S', '15'))
+EVENTS_REPLAY_LAG_S = float(os.environ.get('EVENTS_REPLAY_LAG_S', '10'))
+event_broker = EventBroker(
+    max_buffer=int(os.environ.get('EVENTS_SUBSCRIBER_BUFFER', '256')),
+    history=int(os.environ.get('EVENTS_HISTORY', '1024')),
+)
+change_stream: Optional[ChangeStreamSource] = None
+
+# Retention per collection from RETENTION_*_DAYS (0 keeps everything). Workers with
+# RETENTION_ARCHIVE_DIR set archive expired documents to disk and then delete them;
+# TTL indexes expiring RETENTION_TTL_GRACE_DAYS later are the backstop.
+retention_policies = policies_from_env()
+RETENTION_ARCHIVE_DIR = os.environ.get('RETENTION_ARCHIVE_DIR', '')
+RETENTION_TTL_GRACE = timedelta(days=float(os.environ.get('RETENTION_TTL_GRACE_DAYS', '7')))
+retention_job: Optional[RetentionJob] = None
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Once the app starts, records go through a queue to a background thread as JSON
+# (LOG_FORMAT=text keeps the format above)
+log_pipeline = LogPipeline(
+    level=os.environ.get('LOG_LEVEL', 'INFO'),
+    json_format=os.environ.get('LOG_FORMAT', 'json').lower() == 'json',
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global db, notifier, retention_job, change_stream
+    log_pipeline.start()
+    await mongo.connect()
+    db = mongo.db
+    if not mongo.ready:
+        logger.error("MongoDB warm-up ping failed, skipping index provisioning: %s", mongo.last_error)
+    else:
+        try:
+            await ensure_indexes(db)
+            await ensure_ttl_indexes(db, retention_policies, RETENTION_TTL_GRACE)
+        except Exception as e:
+            logger.error("Index provisioning failed: %s", e)
+    if WRITE_BUFFER_ENABLED:
+        for name in ("status_checks", "contacts"):
+            write_buffers[name] = WriteBuffer(
+                db[name],
+                max_batch_size=WRITE_BUFFER_MAX_BATCH,
+                max_delay=WRITE_BUFFER_MAX_DELAY_MS / 1000,
+                on_flush=lambda docs, name=name: documents_written(name, docs),
+            )
+    smtp_settings = smtp_settings_from_env()
+    if smtp_settings is not None:
+        notifier = ContactNotifier(
+            db,
+            SmtpSender(smtp_settings),
+            smtp_settings.sender,
+            smtp_settings.recipient,
+            digest_delay=float(os.environ.get('NOTIFY_DIGEST_DELAY_S', '60')),
+            batch_size=int(os.environ.get('NOTIFY_BATCH_SIZE', '50')),
+        )
+        notifier.start()
+    if RETENTION_ARCHIVE_DIR and any(policy.retention for policy in retention_policies):
+        retention_job = RetentionJob(
+            db,
+            retention_policies,
+            Path(RETENTION_ARCHIVE_DIR),
+            interval=float(os.environ.get('RETENTION_INTERVAL_S', '3600')),
+            batch_size=int(os.environ.get('RETENTION_BATCH_SIZE', '1000')),
+        )
+        retention_job.start()
+    if EVENTS_SOURCE == "change_stream":
+        change_stream = ChangeStreamSource(db, event_broker, EVENT_TOPICS)
+        change_stream.start()
+
+    yield
+
+    if change_stream is not None:
+        await change_stream.stop()
+        change_stream = None
+
+    if retention_job is not None:
+        await retention_job.stop()
+        retention_job = None
+
+    if notifier is not None:
+        await notifier.stop()
+        notifier = None
+
+    for buffer in write_buffers.values():
+        await buffer.close()
+    write_buffers.clear()
+    await rollup_recorder.close()
+    mongo.close()
+    log_pipeline.stop()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add rate limiting
 app.state.limiter = limiter
@@ -44,6 +259,14 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+class StatusRollup(BaseModel):
+    granularity: str
+    client_name: str
+    bucket: datetime
+    count: int
+    first_seen: datetime
+    last_seen: datetime
+
 class ContactSubmission(BaseModel):
     name: str = Field(..., min_length=2, max_length=50)
     email: EmailStr
@@ -74,6 +297,103 @@ class Contact(BaseModel):
     ip_address: Optional[str] = None
     user_agent: Optional[str] = None
 
+class ContactSearchHit(Contact):
+    score: Optional[float] = None
+
+class ContactTriageUpdate(BaseModel):
+    id: str
+    status: Literal["new", "read", "replied"]
+
+class ContactTriageRequest(BaseModel):
+    updates: List[ContactTriageUpdate] = Field(..., min_length=1, max_length=MAX_TRIAGE_BATCH)
+
+class ContactTriageResult(BaseModel):
+    id: str
+    result: str
+    previous_status: Optional[str] = None
+    status: str
+
+class ContactTriageResponse(BaseModel):
+    results: List[ContactTriageResult]
+    counts: Dict[str, int]
+
+# Read-path serializers: "fast" (projected fields encoded with orjson) or
+# "model" (every document validated through its Pydantic model)
+status_serializer = make_serializer(os.environ.get('STATUS_SERIALIZER', 'fast'), StatusCheck)
+contact_serializer = make_serializer(os.environ.get('CONTACTS_SERIALIZER', 'fast'), Contact)
+contact_search_serializer = make_serializer(os.environ.get('CONTACTS_SERIALIZER', 'fast'), ContactSearchHit)
+
+# Topics of the /api/events feed: the collection, its time field and serializer
+EVENT_TOPICS = {
+    "contacts": EventTopic("created_at", contact_serializer),
+    "status_checks": EventTopic("timestamp", status_serializer),
+}
+
+def publish_event(topic: str, document: dict) -> None:
+    if EVENTS_SOURCE == "local":
+        event_broker.publish(make_event(topic, document, EVENT_TOPICS[topic]))
+
+def documents_written(collection_name: str, documents: List[dict]) -> None:
+    """Bookkeeping for documents now stored in MongoDB."""
+    response_cache.invalidate(collection_name)
+    if collection_name == "status_checks":
+        rollup_recorder.add_many(documents)
+
+async def insert_document(collection_name: str, document: dict) -> None:
+    """Insert through the write buffer when one is running, otherwise directly.
+    Buffered documents reach documents_written once their batch is written, so a
+    list read between enqueue and flush is not cached under the new generation."""
+    buffer = write_buffers.get(collection_name)
+    if buffer is None:
+        await db[collection_name].insert_one(document)
+        documents_written(collection_name, [document])
+    else:
+        await buffer.insert(document, wait=WRITE_BUFFER_ACK != "enqueue")
+        response_cache.invalidate(collection_name)
+
+def export_response(collection_name: str, model, query: dict, sort: list, format: str, compress: bool):
+    """Stream `query` as a CSV/NDJSON download, gzipped unless `compress` is false."""
+    fields = list(model.model_fields)
+    cursor = db[collection_name].find(
+        query, {"_id": 0, **{field: 1 for field in fields}}, batch_size=EXPORT_BATCH_SIZE
+    ).sort(sort)
+    encoder = ENCODERS[format](fields)
+    filename = f"{collection_name}-{datetime.utcnow():%Y%m%dT%H%M%S}.{encoder.extension}"
+    media_type = encoder.media_type
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        stream_export(cursor, encoder, EXPORT_BATCH_SIZE, EXPORT_GZIP_LEVEL if compress else None),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+def require_admin(request: Request) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC; convert query parameters like "...Z" to match."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def time_range(field: str, start: Optional[datetime], end: Optional[datetime]) -> dict:
+    bounds = {}
+    if start:
+        bounds["$gte"] = start
+    if end:
+        bounds["$lt"] = end
+    return {field: bounds} if bounds else {}
+
+def cursor_headers(docs: list, field: str, limit: int) -> Dict[str, str]:
+    cursor_token = next_cursor(docs, field, limit)
+    return {"X-Next-Cursor": cursor_token} if cursor_token else {}
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
@@ -83,17 +403,102 @@ async def root():
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    document = status_obj.dict()
+    await insert_document("status_checks", document)
+    publish_event("status_checks", document)
     return status_obj
 
+def _keyset_query(field: str, after: Optional[str], descending: bool) -> dict:
+    try:
+        return keyset_filter(field, after, descending)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(
+    request: Request,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """Status checks oldest first. Pass the X-Next-Cursor header back as `after`
+    for the next page; `format=ndjson` streams every remaining document instead.
+    JSON pages are cached briefly and revalidate with ETag/If-None-Match."""
+    query = _keyset_query("timestamp", after, descending=False)
+    sort = keyset_sort("timestamp", descending=False)
+    if format == "ndjson":
+        cursor = db.status_checks.find(query, status_serializer.projection, batch_size=STREAM_BATCH_SIZE).sort(sort)
+        return StreamingResponse(
+            stream_ndjson(cursor, status_serializer.dump_line),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+    cache_key = response_cache.key("status_checks", limit, after)
+    cached = response_cache.get(cache_key)
+    if cached is None:
+        status_checks = await db.status_checks.find(query, status_serializer.projection).sort(sort).limit(limit).to_list(limit)
+        cached = response_cache.put(
+            cache_key,
+            status_serializer.dump(status_checks),
+            cursor_headers(status_checks, "timestamp", limit),
+        )
+    return response_cache.to_response(cached, request.headers.get("if-none-match"))
+
+@api_router.get("/status/export")
+async def export_status_checks(
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    client_name: Optional[str] = None,
+    gzip: bool = True,
+):
+    """Download status checks in [start, end), oldest first, streamed in constant memory."""
+    query = time_range("timestamp", start, end)
+    if client_name:
+        query["client_name"] = client_name
+    return export_response("status_checks", StatusCheck, query, keyset_sort("timestamp", descending=False),
+                           format, gzip)
+
+@api_router.get("/status/rollups", response_model=List[StatusRollup])
+async def get_status_rollups(
+    start: datetime,
+    end: Optional[datetime] = None,
+    granularity: Literal["minute", "hour", "day"] = "hour",
+    client_name: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Status check counts per client per bucket in [start, end), oldest first.
+    Reads one rollup document per client and bucket, never the raw checks."""
+    start = naive_utc(start)
+    end = naive_utc(end) or datetime.utcnow()
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if bucket_count(start, end, granularity) > MAX_ROLLUP_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range too large for {granularity} buckets")
+    query = range_filter(granularity, start, end, client_name)
+    return await db[ROLLUP_COLLECTION].find(query, {"_id": 0}).sort(RANGE_SORT).limit(limit).to_list(limit)
+
+@api_router.post("/status/rollups/backfill", dependencies=[Depends(require_admin)])
+async def backfill_status_rollups(start: datetime, end: datetime):
+    """Admin endpoint to rebuild the rollups for [start, end) from the raw status
+    checks. The range is bounded and only one backfill runs at a time."""
+    start, end = naive_utc(start), naive_utc(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > MAX_BACKFILL_RANGE:
+        raise HTTPException(status_code=400, detail=f"Range must be at most {MAX_BACKFILL_RANGE.days} days")
+    if rollup_backfill_lock.locked():
+        raise HTTPException(status_code=409, detail="A backfill is already running")
+    async with rollup_backfill_lock:
+        return {"buckets": await backfill(db, start, end)}
 
 @api_router.post("/contact", response_model=ContactResponse)
 @limiter.limit("5/minute")
 async def submit_contact(request: Request, contact_data: ContactSubmission):
+    submission_key = fingerprint(contact_data.email, contact_data.message)
+    # Reserved before the first await, so concurrent copies are rejected as well
+    if duplicate_filter is not None and not duplicate_filter.reserve(submission_key):
+        raise HTTPException(status_code=409, detail="This message has already been submitted")
+
     try:
         # Create contact object
         contact = Contact(
@@ -105,46 +510,203 @@ async def submit_contact(request: Request, contact_data: ContactSubmission):
         )
         
         # Save to database
-        result = await db.contacts.insert_one(contact.dict())
+        document = contact.dict()
+        await insert_document("contacts", document)
+        publish_event("contacts", document)
+        if duplicate_filter is not None:
+            duplicate_filter.commit(submission_key)
+        if notifier is not None:
+            notifier.notify()
         
-        if result.inserted_id:
-            logging.info(f"New contact submission from {contact_data.email}")
-            return ContactResponse(
-                success=True,
-                message="Thank you for your message! I'll get back to you soon.",
-                id=contact.id
-            )
-        else:
-            raise HTTPException(status_code=500, detail="Failed to save contact")
+        logger.info("New contact submission from %s", contact_data.email)
+        return ContactResponse(
+            success=True,
+            message="Thank you for your message! I'll get back to you soon.",
+            id=contact.id
+        )
             
     except Exception as e:
-        logging.error(f"Contact submission error: {str(e)}")
+        logger.error("Contact submission error: %s", e)
         raise HTTPException(status_code=500, detail="Failed to submit contact form")
+    finally:
+        if duplicate_filter is not None:
+            duplicate_filter.release(submission_key)
 
 @api_router.get("/contacts", response_model=List[Contact])
-async def get_contacts(limit: int = 50):
-    """Admin endpoint to view contacts (for development/testing)"""
-    contacts = await db.contacts.find().sort("created_at", -1).limit(limit).to_list(limit)
-    return [Contact(**contact) for contact in contacts]
+async def get_contacts(
+    request: Request,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """Admin endpoint to view contacts (for development/testing), newest first.
+    Paginate with the X-Next-Cursor header; `format=ndjson` streams the rest.
+    JSON pages are cached briefly and revalidate with ETag/If-None-Match."""
+    query = _keyset_query("created_at", after, descending=True)
+    sort = keyset_sort("created_at", descending=True)
+    if format == "ndjson":
+        cursor = db.contacts.find(query, contact_serializer.projection, batch_size=STREAM_BATCH_SIZE).sort(sort)
+        return StreamingResponse(
+            stream_ndjson(cursor, contact_serializer.dump_line),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+    cache_key = response_cache.key("contacts", limit, after)
+    cached = response_cache.get(cache_key)
+    if cached is None:
+        contacts = await db.contacts.find(query, contact_serializer.projection).sort(sort).limit(limit).to_list(limit)
+        cached = response_cache.put(
+            cache_key,
+            contact_serializer.dump(contacts),
+            cursor_headers(contacts, "created_at", limit),
+        )
+    return response_cache.to_response(cached, request.headers.get("if-none-match"))
+
+@api_router.get("/contacts/search", response_model=List[ContactSearchHit])
+async def search_contacts(
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
+    status: Optional[Literal["new", "read", "replied"]] = None,
+    email: Optional[str] = None,
+    email_domain: Optional[str] = Query(None, max_length=255),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """Admin endpoint to find contacts. `q` is a full-text search over name and
+    message ranked by relevance (with a `score` per hit); the other filters
+    combine with it. Without `q`, results are newest first and paginate with
+    the X-Next-Cursor header like /contacts."""
+    if q and after:
+        raise HTTPException(status_code=400, detail="Cursor pagination is not supported with q")
+    search = build_contact_search(q, status, email, email_domain, created_from, created_to)
+    query = search.filter
+    if after:
+        query = {"$and": [query, _keyset_query("created_at", after, descending=True)]}
+    projection = search.projection or None
+    if contact_search_serializer.projection is not None:
+        projection = {**contact_search_serializer.projection, **search.projection}
+    hits = await db.contacts.find(query, projection).sort(search.sort).limit(limit).to_list(limit)
+    headers = {} if q else cursor_headers(hits, "created_at", limit)
+    return Response(content=contact_search_serializer.dump(hits), media_type="application/json", headers=headers)
+
+@api_router.get("/contacts/export")
+async def export_contacts(
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[Literal["new", "read", "replied"]] = None,
+    gzip: bool = True,
+):
+    """Admin endpoint to download contacts created in [start, end), oldest first,
+    streamed in constant memory."""
+    query = time_range("created_at", start, end)
+    if status:
+        query["status"] = status
+    return export_response("contacts", Contact, query, keyset_sort("created_at", descending=False), format, gzip)
+
+@api_router.post("/contacts/triage", response_model=ContactTriageResponse, dependencies=[Depends(require_admin)])
+async def triage_contacts(triage: ContactTriageRequest):
+    """Admin endpoint to move many contacts between new/read/replied in one write."""
+    results = await apply_triage(db.contacts, [(u.id, u.status) for u in triage.updates])
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result["result"]] = counts.get(result["result"], 0) + 1
+    if counts.get("updated"):
+        response_cache.invalidate("contacts")
+    return ContactTriageResponse(results=results, counts=counts)
+
+async def replay_events(topic: str, after):
+    """Documents inserted after a Last-Event-ID position, oldest first, page by page."""
+    spec = EVENT_TOPICS[topic]
+    cursor = encode_cursor(*after)
+    while cursor:
+        query = keyset_filter(spec.time_field, cursor, descending=False)
+        docs = await db[topic].find(query, spec.serializer.projection).sort(
+            keyset_sort(spec.time_field, descending=False)).limit(STREAM_BATCH_SIZE).to_list(STREAM_BATCH_SIZE)
+        for doc in docs:
+            yield make_event(topic, doc, spec)
+        cursor = next_cursor(docs, spec.time_field, STREAM_BATCH_SIZE)
+
+@api_router.get("/events")
+async def events(request: Request, topics: str = "contacts,status_checks"):
+    """Admin feed of new contacts and status checks as Server-Sent Events.
+    Reconnecting with Last-Event-ID resends whatever was inserted meanwhile."""
+    names = [name for name in dict.fromkeys(topics.split(",")) if name]
+    unknown = [name for name in names if name not in EVENT_TOPICS]
+    if not names or unknown:
+        raise HTTPException(status_code=400, detail=f"topics must be among {sorted(EVENT_TOPICS)}")
+    resume, positions = None, {}
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        try:
+            resume, positions = decode_last_event_id(last_event_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        event_stream(event_broker, names, positions, replay_events, heartbeat=EVENTS_HEARTBEAT_S,
+                     resume=resume, replay_lag=EVENTS_REPLAY_LAG_S),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.get("/stats")
+async def get_stats():
+    """Internal counters for the in-process subsystems."""
+    return {
+        "write_buffers": {name: buffer.stats() for name, buffer in write_buffers.items()},
+        "response_cache": response_cache.stats(),
+        "compression": compressor.stats() if compressor is not None else None,
+        "log_records_suppressed": log_pipeline.sampler.total_suppressed,
+        "duplicate_filter": duplicate_filter.stats() if duplicate_filter is not None else None,
+        "notifications": notifier.stats() if notifier is not None else None,
+        "rollups": rollup_recorder.stats(),
+        "events": event_broker.stats(),
+        "idempotency": idempotency_store.stats(),
+        "retention": retention_job.stats() if retention_job is not None else None,
+    }
+
+@api_router.post("/retention/run", dependencies=[Depends(require_admin)])
+async def run_retention():
+    """Admin endpoint to archive and delete expired documents now."""
+    if retention_job is None:
+        raise HTTPException(status_code=404, detail="Archival is disabled")
+    return {"reports": await retention_job.run_once()}
+
+@api_router.get("/health")
+async def health(response: Response):
+    """Readiness probe: pings MongoDB and reports connection pool statistics."""
+    report = await mongo.health()
+    if report["status"] != "ok":
+        response.status_code = 503
+    return report
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus scrape endpoint."""
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Inside CORS so replayed responses get the same CORS headers
+app.add_middleware(
+    IdempotencyMiddleware,
+    store=idempotency_store,
+    routes=[("POST", "/api/contact"), ("POST", "/api/status")],
+)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+if compressor is not None:
+    app.add_middleware(CompressionMiddleware, compressor=compressor)
+if metrics is not None:
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+app.add_middleware(RequestContextMiddleware)
@@ -0,0 +1,76 @@
+"""Bulk contact status transitions applied with a single unordered bulk_write."""
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from pymongo import UpdateOne
+
+CONTACT_STATUSES = ("new", "read", "replied")
+
+# Statuses each status may move to. "replied" is final.
+ALLOWED_TRANSITIONS: Dict[str, frozenset] = {
+    "new": frozenset({"read", "replied"}),
+    "read": frozenset({"new", "replied"}),
+    "replied": frozenset(),
+}
+
+# Per-id outcomes
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+INVALID_TRANSITION = "invalid_transition"
+CONFLICT = "conflict"
+DUPLICATE = "duplicate"
+
+
+async def apply_triage(collection, updates: List[Tuple[str, str]]) -> List[dict]:
+    """Move each (contact id, target status) pair, returning one result per pair.
+
+    Reads the current statuses in one query, validates every transition locally,
+    then writes all valid ones in one unordered bulk_write. Each update is guarded
+    by the status it was validated against, so a concurrent change makes it a
+    `conflict` instead of an unchecked transition; only in that case is a third
+    query made to find out which ids lost the race.
+    """
+    ids = list(dict.fromkeys(contact_id for contact_id, _ in updates))
+    current = {
+        doc["id"]: doc["status"]
+        async for doc in collection.find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "status": 1})
+    }
+
+    results, operations, seen = [], [], set()
+    now = datetime.utcnow()
+    for contact_id, target in updates:
+        result = {"id": contact_id, "previous_status": current.get(contact_id), "status": target}
+        results.append(result)
+        if contact_id in seen:
+            result["result"] = DUPLICATE
+            continue
+        seen.add(contact_id)
+        status = current.get(contact_id)
+        if status is None:
+            result["result"] = NOT_FOUND
+        elif status == target:
+            result["result"] = UNCHANGED
+        elif target not in ALLOWED_TRANSITIONS.get(status, ()):
+            result["result"] = INVALID_TRANSITION
+        else:
+            result["result"] = UPDATED
+            operations.append(UpdateOne(
+                {"id": contact_id, "status": status},
+                {"$set": {"status": target, "status_updated_at": now}},
+            ))
+
+    if operations:
+        write = await collection.bulk_write(operations, ordered=False)
+        if write.modified_count < len(operations):
+            attempted = [r for r in results if r["result"] == UPDATED]
+            after = {
+                doc["id"]: doc["status"]
+                async for doc in collection.find(
+                    {"id": {"$in": [r["id"] for r in attempted]}}, {"_id": 0, "id": 1, "status": 1}
+                )
+            }
+            for result in attempted:
+                if after.get(result["id"]) != result["status"]:
+                    result["result"] = CONFLICT
+    return results
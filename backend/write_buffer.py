@@ -0,0 +1,126 @@
+"""In-process write-behind buffer that groups single-document inserts into insert_many batches."""
+import asyncio
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    """Collects documents for one collection and flushes them with insert_many when
+    `max_batch_size` documents are queued or `max_delay` seconds have passed since
+    the first one arrived, whichever comes first.
+
+    `insert(doc, wait=True)` resolves once the batch containing the document has been
+    written (ack after flush); `wait=False` returns as soon as it is queued (ack on
+    enqueue), in which case write errors are only logged.
+
+    `on_flush`, if given, is called with the documents of each batch that were
+    written, before any waiting `insert` resolves.
+    """
+
+    def __init__(self, collection, max_batch_size: int = 100, max_delay: float = 0.05,
+                 on_flush: Optional[Callable[[List[dict]], None]] = None):
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.on_flush = on_flush
+        self._pending: List[Tuple[dict, Optional[asyncio.Future]]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes = set()
+        self._closed = False
+        self.batches_written = 0
+        self.documents_written = 0
+        self.write_errors = 0
+        self.last_batch_size = 0
+        self.largest_batch_size = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    async def insert(self, document: dict, wait: bool = True) -> None:
+        if self._closed:
+            raise RuntimeError("Write buffer is closed")
+        future = asyncio.get_running_loop().create_future() if wait else None
+        self._pending.append((document, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_delay())
+        if future is not None:
+            await future
+
+    async def _flush_after_delay(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        self._start_flush()
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._write(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: List[Tuple[dict, Optional[asyncio.Future]]]) -> None:
+        failed = {}
+        try:
+            await self.collection.insert_many([doc for doc, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = e
+        except Exception as e:
+            failed = {index: e for index in range(len(batch))}
+
+        self.batches_written += 1
+        self.documents_written += len(batch) - len(failed)
+        self.write_errors += len(failed)
+        self.last_batch_size = len(batch)
+        self.largest_batch_size = max(self.largest_batch_size, len(batch))
+
+        written = [doc for index, (doc, _) in enumerate(batch) if index not in failed]
+        if written and self.on_flush is not None:
+            try:
+                self.on_flush(written)
+            except Exception as e:
+                logger.error("Write buffer flush callback for %s failed: %s", self.collection.name, e)
+
+        for index, (_, future) in enumerate(batch):
+            error = failed.get(index)
+            if future is None:
+                if error is not None:
+                    logger.error("Buffered insert into %s failed: %s", self.collection.name, error)
+            elif not future.done():
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(None)
+
+    async def flush(self) -> None:
+        """Write everything queued so far and wait for all in-flight batches."""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    async def close(self) -> None:
+        self._closed = True
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.depth,
+            "in_flight_batches": len(self._flushes),
+            "batches_written": self.batches_written,
+            "documents_written": self.documents_written,
+            "write_errors": self.write_errors,
+            "last_batch_size": self.last_batch_size,
+            "largest_batch_size": self.largest_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "max_delay_ms": int(self.max_delay * 1000),
+        }
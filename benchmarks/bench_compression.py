@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+CPU cost against bytes saved for response compression at typical payload sizes.
+
+Payloads are GET /api/status pages (10, 100 and 1000 checks) and GET
+/api/contacts pages (50 and 1000 contacts) encoded as the fast serializer
+would. Each row is one encoding and level; "cached" is the cost of serving the
+same body again from the compressed-body cache.
+
+    python benchmarks/bench_compression.py [--repeat 20]
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import orjson  # noqa: E402
+
+from compression import CompressedBodyCache, ResponseCompressor, brotli  # noqa: E402
+from response_cache import make_etag  # noqa: E402
+
+SETTINGS = [("gzip", level) for level in (1, 6, 9)] + (
+    [("br", quality) for quality in (1, 4, 6, 11)] if brotli is not None else [])
+
+
+def status_page(count):
+    start = datetime(2025, 1, 1)
+    return orjson.dumps([{"id": str(uuid.uuid4()), "client_name": f"client-{i % 5}",
+                          "timestamp": start + timedelta(seconds=i)} for i in range(count)])
+
+
+def contacts_page(count):
+    start = datetime(2025, 1, 1)
+    return orjson.dumps([{
+        "id": str(uuid.uuid4()), "name": "Jane Doe", "email": f"jane{i}@example.com",
+        "message": "Hello, I'm interested in your AI engineering services. " * 3,
+        "created_at": start + timedelta(seconds=i), "status": "new",
+        "ip_address": "203.0.113.7", "user_agent": "Mozilla/5.0 (X11; Linux x86_64)",
+    } for i in range(count)])
+
+
+PAYLOADS = [
+    ("status x10", status_page(10)),
+    ("status x100", status_page(100)),
+    ("status x1000", status_page(1000)),
+    ("contacts x50", contacts_page(50)),
+    ("contacts x1000", contacts_page(1000)),
+]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'payload':<15} {'bytes':>8}  {'encoding':<8} {'out':>8} {'saved':>6} {'cpu':>10} {'MB/s':>7} {'cached':>9}")
+    for name, body in PAYLOADS:
+        etag = make_etag(body)
+        for encoding, level in SETTINGS:
+            compressor = ResponseCompressor(gzip_level=level, brotli_quality=level, cache=CompressedBodyCache())
+            seconds, compressed = timed(lambda: compressor.compress(body, encoding), args.repeat)
+            compressor.compress_cached(body, encoding, etag)
+            cached, _ = timed(lambda: compressor.compress_cached(body, encoding, etag), args.repeat)
+            print(f"{name:<15} {len(body):>8}  {f'{encoding}-{level}':<8} {len(compressed):>8} "
+                  f"{1 - len(compressed) / len(body):>6.0%} {seconds * 1e6:>7.0f} us "
+                  f"{len(body) / seconds / 1e6:>7.1f} {cached * 1e6:>6.1f} us")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Cost per check of the contact duplicate filters.
+
+Times fingerprinting alone and fingerprint plus check_and_add for the LRU and
+rotating Bloom filters, with a mix of fresh and repeated submissions, and
+reports the memory each filter holds afterwards.
+
+    python benchmarks/bench_dedupe.py [--checks 200000] [--repeat 0.2]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from dedupe import LruDuplicateFilter, RotatingBloomFilter, fingerprint  # noqa: E402
+
+MESSAGE = "Hi, I saw your portfolio and would love to talk about a project. Submission {}."
+
+
+def submissions(checks, repeat):
+    rng = random.Random(7)
+    seen = []
+    for i in range(checks):
+        if seen and rng.random() < repeat:
+            yield rng.choice(seen)
+        else:
+            submission = (f"user{i}@example.com", MESSAGE.format(i))
+            seen.append(submission)
+            yield submission
+
+
+def bench(name, check, inputs):
+    timings = []
+    for email, message in inputs:
+        start = time.perf_counter()
+        check(email, message)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{name:<28} mean {statistics.mean(timings) * 1e6:7.2f} us   "
+          f"p50 {timings[len(timings) // 2] * 1e6:7.2f} us   "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:7.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--repeat", type=float, default=0.2, help="share of submissions that are resubmits")
+    parser.add_argument("--fp-rate", type=float, default=1e-6)
+    parser.add_argument("--max-bytes", type=int, default=1 << 20)
+    args = parser.parse_args()
+    inputs = list(submissions(args.checks, args.repeat))
+
+    bench("fingerprint only", fingerprint, inputs)
+    filters = [
+        ("lru", lambda: LruDuplicateFilter(max_entries=args.checks)),
+        ("bloom", lambda: RotatingBloomFilter(fp_rate=args.fp_rate, max_bytes=args.max_bytes)),
+    ]
+    for name, make in filters:
+        dup = make()
+        bench(f"fingerprint + {name}", lambda email, message: dup.check_and_add(fingerprint(email, message)),
+              inputs)
+        # Memory is measured on a second, untimed pass (tracing slows every allocation)
+        keys = [fingerprint(email, message) for email, message in inputs]
+        tracemalloc.start()
+        traced = make()
+        for key in keys:
+            traced.check_and_add(key)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{'':<28} rejected {dup.stats()['rejected']}, holding {memory / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
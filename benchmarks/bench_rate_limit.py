@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Per-request overhead of the /api/contact rate limiter storages.
+
+Compares the previous default (limits' in-memory fixed window) with the local
+sliding-window storage and the shared MongoDB bucket storage. The MongoDB run is
+skipped when MONGO_URL is not reachable.
+
+slowapi calls the storage synchronously on the event loop, so each timing below
+is also how long one /api/contact request blocks the whole worker.
+
+    python benchmarks/bench_rate_limit.py [--hits 20000] [--keys 1000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from limits import parse  # noqa: E402
+from limits.storage import MemoryStorage  # noqa: E402
+from limits.strategies import FixedWindowRateLimiter, SlidingWindowCounterRateLimiter  # noqa: E402
+from pymongo import MongoClient  # noqa: E402
+from pymongo.errors import PyMongoError  # noqa: E402
+
+from rate_limit import LocalSlidingWindowStorage, MongoBucketStorage  # noqa: E402
+
+LIMIT = parse("5/minute")
+
+
+def bench(name, limiter, hits, keys):
+    timings = []
+    for i in range(hits):
+        start = time.perf_counter()
+        limiter.hit(LIMIT, f"10.0.{i % keys // 256}.{i % 256}")
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{name:<32} mean {statistics.mean(timings) * 1e6:8.1f} us   "
+          f"p50 {timings[len(timings) // 2] * 1e6:8.1f} us   "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:8.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hits", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=1000, help="distinct client IPs")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    args = parser.parse_args()
+
+    bench("memory:// fixed-window (old)", FixedWindowRateLimiter(MemoryStorage()), args.hits, args.keys)
+    bench("local:// sliding-window", SlidingWindowCounterRateLimiter(LocalSlidingWindowStorage()), args.hits, args.keys)
+
+    print("mongo-buckets:// blocks the event loop for one round trip per allowed hit "
+          "(two when over the limit), up to its timeout_ms while MongoDB is unreachable")
+    client = MongoClient(args.mongo_url, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        print(f"{'mongo-buckets:// sliding-window':<32} skipped, {args.mongo_url} not reachable")
+        return
+    collection = client["rate_limit_bench"]["rate_limits"]
+    try:
+        storage = MongoBucketStorage(collection=collection)
+        bench("mongo-buckets:// sliding-window", SlidingWindowCounterRateLimiter(storage),
+              min(args.hits, 5000), args.keys)
+    finally:
+        client.drop_database("rate_limit_bench")
+
+
+if __name__ == "__main__":
+    main()
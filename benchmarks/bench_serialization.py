@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Read-path serialization cost for GET /api/contacts at 50, 1000 and 10k documents.
+
+"current" is the pre-existing path: build a Contact per document, then FastAPI
+re-validates the list against response_model before encoding it. "model" and
+"fast" are the two serializers in backend/serializers.py.
+
+    python benchmarks/bench_serialization.py [--repeat 20]
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+import server  # noqa: E402
+from serializers import ModelSerializer, ProjectedSerializer, render_json  # noqa: E402
+
+SIZES = (50, 1000, 10000)
+
+
+def make_docs(count):
+    start = datetime(2025, 1, 1)
+    return [{
+        "id": str(uuid.uuid4()),
+        "name": "Jane Doe",
+        "email": f"jane{i}@example.com",
+        "message": "Hello, I'm interested in your AI engineering services. " * 3,
+        "created_at": start + timedelta(seconds=i),
+        "status": "new",
+        "ip_address": "203.0.113.7",
+        "user_agent": "Mozilla/5.0 (X11; Linux x86_64)",
+    } for i in range(count)]
+
+
+def current_path(docs):
+    adapter = TypeAdapter(List[server.Contact])
+    contacts = [server.Contact(**doc) for doc in docs]
+    return render_json(jsonable_encoder(adapter.validate_python(contacts)))
+
+
+def timed(fn, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    paths = {
+        "current": current_path,
+        "model": ModelSerializer(server.Contact).dump,
+        "fast": ProjectedSerializer(server.Contact).dump,
+    }
+    print(f"{'docs':>6}  " + "  ".join(f"{name:>12}" for name in paths) + "  fast speedup")
+    for size in SIZES:
+        docs = make_docs(size)
+        results = {name: timed(fn, docs, args.repeat) for name, fn in paths.items()}
+        print(f"{size:>6}  " + "  ".join(f"{results[name] * 1000:>9.2f} ms" for name in paths)
+              + f"  {results['current'] / results['fast']:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Round-trips and latency of bulk contact triage at 10, 1k and 10k ids.
+
+Compares apply_triage (one find, one unordered bulk_write) with the per-message
+alternative it replaces (one update_one per id). Runs against MONGO_URL when it
+is reachable, counting the commands (getMore included) seen by the metrics
+command listener. Otherwise it runs against in-memory mongomock-motor, where
+latencies only reflect client-side cost, find is counted in the batches a server
+would return, and the default sizes are smaller (per-message updates scan the
+whole collection there, so 10k ids take minutes).
+
+    python benchmarks/bench_triage.py [--sizes 10 1000 10000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import bson  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+from pymongo.errors import PyMongoError  # noqa: E402
+
+from metrics import Metrics, MongoCommandTimer  # noqa: E402
+from triage import apply_triage  # noqa: E402
+
+# Server defaults for a find without batch_size: 101 documents in the first
+# batch, then getMore batches of up to 16 MiB
+FIRST_BATCH = 101
+MAX_BATCH_BYTES = 16 * 1024 * 1024
+
+DEFAULT_SIZES = {"mongodb": [10, 1000, 10000], "mongomock": [10, 100, 1000]}
+
+
+class BatchCountingCursor:
+    """Counts the find and getMore round trips a server would need for the
+    documents read from a mongomock cursor."""
+
+    def __init__(self, cursor, counter):
+        self.cursor = cursor
+        self.counter = counter
+
+    async def __aiter__(self):
+        in_batch, batch_bytes, limit = 0, 0, FIRST_BATCH
+        self.counter.round_trips += 1
+        async for doc in self.cursor:
+            size = len(bson.encode(doc))
+            full = batch_bytes + size > MAX_BATCH_BYTES if limit is None else in_batch >= limit
+            if full:
+                self.counter.round_trips += 1
+                in_batch, batch_bytes, limit = 0, 0, None
+            in_batch += 1
+            batch_bytes += size
+            yield doc
+
+
+class CountingCollection:
+    """Counts the database calls made through a mongomock-motor collection."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.round_trips = 0
+
+    def find(self, *args, **kwargs):
+        return BatchCountingCursor(self.collection.find(*args, **kwargs), self)
+
+    async def bulk_write(self, *args, **kwargs):
+        self.round_trips += 1
+        return await self.collection.bulk_write(*args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        self.round_trips += 1
+        return await self.collection.update_one(*args, **kwargs)
+
+
+async def per_message(collection, updates):
+    for contact_id, status in updates:
+        await collection.update_one({"id": contact_id}, {"$set": {"status": status}})
+
+
+class ListenerCounter:
+    """Counts the commands on one collection seen by a MongoCommandTimer."""
+
+    def __init__(self, collection, timer):
+        self.collection = collection
+        self.timer = timer
+        timer.metrics = Metrics()
+
+    @property
+    def round_trips(self):
+        return sum(histogram.count for (collection, _), histogram in self.timer.metrics.mongo_latency.items()
+                   if collection == self.collection.name)
+
+
+async def connect(mongo_url):
+    timer = MongoCommandTimer(Metrics())
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=500, event_listeners=[timer])
+    try:
+        await client.admin.command("ping")
+        return client, "mongodb", timer
+    except PyMongoError:
+        client.close()
+        return AsyncMongoMockClient(), "mongomock", None
+
+
+async def main(args):
+    client, backend, timer = await connect(args.mongo_url)
+    db = client["triage_bench"]
+    print(f"backend: {backend}")
+    print(f"{'ids':>6}  {'approach':<12} {'round-trips':>11} {'latency':>12}")
+    try:
+        for size in args.sizes or DEFAULT_SIZES[backend]:
+            for name, run in (("bulk", apply_triage), ("per-message", per_message)):
+                await db.contacts.delete_many({})
+                ids = [str(uuid.uuid4()) for _ in range(size)]
+                await db.contacts.insert_many([
+                    {"id": contact_id, "name": "Bench User", "email": "bench@example.com",
+                     "message": "Benchmark message", "created_at": datetime.utcnow(), "status": "new"}
+                    for contact_id in ids
+                ])
+                if backend == "mongodb":
+                    await db.contacts.create_index("id", unique=True)
+                if timer is not None:
+                    collection = db.contacts
+                    counter = ListenerCounter(db.contacts, timer)
+                else:
+                    collection = counter = CountingCollection(db.contacts)
+                start = time.perf_counter()
+                await run(collection, [(contact_id, "read") for contact_id in ids])
+                elapsed = time.perf_counter() - start
+                print(f"{size:>6}  {name:<12} {counter.round_trips:>11} {elapsed * 1000:>9.1f} ms")
+    finally:
+        await client.drop_database("triage_bench")
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="ids per run (default: 10 1000 10000, or 10 100 1000 under mongomock)")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+In-process load test for the portfolio API.
+
+Mounts server.app behind an httpx ASGI transport with an in-memory
+mongomock-motor database, drives a concurrent mixed workload over
+/api/status, /api/contact and /api/contacts, and reports p50/p95/p99 latency
+and requests/sec per route. Results can be written as JSON and compared with a
+previous run:
+
+    python benchmarks/load_test.py --requests 5000 --concurrency 50 --output run.json
+    python benchmarks/load_test.py --output new.json --compare run.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+import server  # noqa: E402
+
+# (label, weight, method, path, body factory)
+WORKLOAD = [
+    ("POST /api/status", 2, "POST", "/status", lambda i: {"client_name": f"load client {i % 20}"}),
+    ("GET /api/status", 3, "GET", "/status?limit=100", None),
+    ("POST /api/contact", 1, "POST", "/contact", lambda i: {
+        "name": "Load Tester",
+        "email": f"load{i}@example.com",
+        "message": f"Load test message number {i} with enough characters",
+    }),
+    ("GET /api/contacts", 4, "GET", "/contacts?limit=50", None),
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def seed(db, status_count, contact_count):
+    start = datetime.utcnow() - timedelta(days=1)
+    if status_count:
+        await db.status_checks.insert_many([
+            {"id": str(uuid.uuid4()), "client_name": f"seed {i % 20}", "timestamp": start + timedelta(seconds=i)}
+            for i in range(status_count)
+        ])
+    if contact_count:
+        await db.contacts.insert_many([
+            {"id": str(uuid.uuid4()), "name": "Seed User", "email": f"seed{i}@example.com",
+             "message": "Seeded message for load testing", "created_at": start + timedelta(seconds=i),
+             "status": "new", "ip_address": "127.0.0.1", "user_agent": "load-test"}
+            for i in range(contact_count)
+        ])
+
+
+async def run(args):
+    server.db = AsyncMongoMockClient()[f"load_test_{uuid.uuid4().hex[:8]}"]
+    server.limiter.enabled = args.rate_limit
+    await seed(server.db, args.seed_status, args.seed_contacts)
+
+    rng = random.Random(args.random_seed)
+    labels = [entry for entry in WORKLOAD for _ in range(entry[1])]
+    plan = [rng.choice(labels) for _ in range(args.requests)]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    next_index = iter(range(len(plan)))
+
+    transport = ASGITransport(app=server.app)
+    async with AsyncClient(transport=transport, base_url="http://load-test/api") as client:
+        async def worker():
+            for i in next_index:
+                label, _, method, path, body = plan[i]
+                start = time.perf_counter()
+                response = await client.request(method, path, json=body(i) if body else None)
+                latencies[label].append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors[label] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed_status": args.seed_status,
+            "seed_contacts": args.seed_contacts,
+            "rate_limit": args.rate_limit,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(all_latencies, sum(errors.values()), elapsed),
+        "routes": {label: summarize(values, errors[label], elapsed) for label, values in sorted(latencies.items())},
+    }
+
+
+def print_report(result, baseline=None):
+    def row(label, stats, base):
+        line = (f"{label:<20} {stats['requests']:>8} {stats['errors']:>6} {stats['rps']:>9.1f} "
+                f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+        if base:
+            deltas = [(stats[key] - base[key]) / base[key] * 100 if base[key] else 0.0
+                      for key in ("rps", "p50_ms", "p99_ms")]
+            line += "   rps {:+.1f}%  p50 {:+.1f}%  p99 {:+.1f}%".format(*deltas)
+        return line
+
+    print(f"{'route':<20} {'requests':>8} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    base_routes = baseline["routes"] if baseline else {}
+    for label, stats in result["routes"].items():
+        print(row(label, stats, base_routes.get(label)))
+    print(row("overall", result["overall"], baseline["overall"] if baseline else None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed-status", type=int, default=1000, help="status checks to preload")
+    parser.add_argument("--seed-contacts", type=int, default=200, help="contacts to preload")
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="keep the 5/minute contact limit (all load comes from one client address)")
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--log-level", default="WARNING", help="root log level while the load runs")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run to diff against")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(args.log_level)
+    result = asyncio.run(run(args))
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(result, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,22 @@ import axios from 'axios';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// crypto.randomUUID only exists in secure contexts (and recent browsers)
+const newIdempotencyKey = () => {
+  if (window.crypto?.randomUUID) {
+    return window.crypto.randomUUID();
+  }
+  const bytes = new Uint8Array(16);
+  if (window.crypto?.getRandomValues) {
+    window.crypto.getRandomValues(bytes);
+  } else {
+    for (let i = 0; i < bytes.length; i++) {
+      bytes[i] = Math.floor(Math.random() * 256);
+    }
+  }
+  return Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+};
+
 const Contact = () => {
   const sectionRef = useRef(null);
   const { toast } = useToast();
@@ -20,12 +36,15 @@ const Contact = () => {
   });
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [submitStatus, setSubmitStatus] = useState(null); // 'success', 'error', null
+  // One key per message, so retries and double submits of it are only stored once
+  const idempotencyKeyRef = useRef(null);
 
   const handleInputChange = (e) => {
     setFormData({
       ...formData,
       [e.target.name]: e.target.value
     });
+    idempotencyKeyRef.current = null;
     // Clear status when user starts typing
     if (submitStatus) {
       setSubmitStatus(null);
@@ -67,10 +86,15 @@ const Contact = () => {
     setSubmitStatus(null);
 
     try {
+      if (!idempotencyKeyRef.current) {
+        idempotencyKeyRef.current = newIdempotencyKey();
+      }
       const response = await axios.post(`${API}/contact`, {
         name: formData.name.trim(),
         email: formData.email.trim(),
         message: formData.message.trim()
+      }, {
+        headers: { 'Idempotency-Key': idempotencyKeyRef.current }
       });
 
       if (response.data.success) {
@@ -83,6 +107,7 @@ const Contact = () => {
         
         // Clear form
         setFormData({ name: '', email: '', message: '' });
+        idempotencyKeyRef.current = null;
       }
     } catch (error) {
       setSubmitStatus('error');
@@ -0,0 +1,67 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from mongomock_motor import AsyncMongoMockClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+from dedupe import RotatingBloomFilter  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+from rollups import ROLLUP_COLLECTION, RollupRecorder  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Swap the app's Motor database for an in-memory mongomock one (and start
+    from an empty response cache, duplicate filter, rollup recorder and rate
+    limit budget)."""
+    mock_db = AsyncMongoMockClient()["test_database"]
+    monkeypatch.setattr(server, "db", mock_db)
+    monkeypatch.setattr(server, "response_cache", ResponseCache())
+    monkeypatch.setattr(server, "duplicate_filter", RotatingBloomFilter())
+    monkeypatch.setattr(server, "rollup_recorder", RollupRecorder(lambda: mock_db[ROLLUP_COLLECTION]))
+    server.limiter.reset()
+    return mock_db
+
+
+@pytest.fixture
+async def api(db):
+    transport = ASGITransport(app=server.app)
+    async with AsyncClient(transport=transport, base_url="http://test/api") as client:
+        yield client
+    await server.rollup_recorder.close()
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    """Enable the admin routes; returns the headers that authorize a request."""
+    monkeypatch.setattr(server, "ADMIN_TOKEN", "test-admin-token")
+    return {"Authorization": "Bearer test-admin-token"}
+
+
+@pytest.fixture
+async def live_db():
+    """A real MongoDB, for what mongomock cannot do (explain plans, $merge, $text);
+    skipped when none is reachable."""
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"),
+                                serverSelectionTimeoutMS=500)
+    try:
+        await client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip("MongoDB not reachable")
+    database = client["index_plan_check"]
+    yield database
+    await client.drop_database("index_plan_check")
+    client.close()
@@ -0,0 +1,102 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from compression import CompressedBodyCache, CompressionMiddleware, ResponseCompressor, accepted_encodings
+
+pytestmark = pytest.mark.anyio
+
+BODY = b'[' + b','.join(b'{"id":"%d","client_name":"web"}' % i for i in range(200)) + b']'
+
+
+def make_app(compressor):
+    app = FastAPI()
+
+    @app.get("/big")
+    async def big():
+        return Response(BODY, media_type="application/json", headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    async def small():
+        return Response(b'{"ok":true}', media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(100):
+                yield b'{"n":%d}\n' % i
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/download")
+    async def download():
+        return Response(gzip.compress(BODY), media_type="application/gzip")
+
+    app.add_middleware(CompressionMiddleware, compressor=compressor)
+    return app
+
+
+@pytest.fixture
+def compressor():
+    return ResponseCompressor(minimum_size=500, cache=CompressedBodyCache())
+
+
+@pytest.fixture
+async def client(compressor):
+    transport = ASGITransport(app=make_app(compressor))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def test_negotiation(compressor):
+    assert accepted_encodings("gzip;q=0.5, br") == {"gzip": 0.5, "br": 1.0}
+    assert compressor.choose_encoding("gzip, deflate, br") == "br"
+    assert compressor.choose_encoding("gzip, br;q=0.1") == "gzip"
+    assert compressor.choose_encoding("br;q=0, gzip;q=0") is None
+    assert compressor.choose_encoding("*") == "br"
+    assert compressor.choose_encoding("identity") is None
+
+
+async def test_large_bodies_are_compressed_and_cached(client, compressor):
+    for _ in range(2):
+        response = await client.get("/big", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"] == 'W/"abc"'
+        assert response.content == BODY
+
+    assert compressor.cache.stats()["hits"] == 1
+    assert compressor.bytes_out < compressor.bytes_in / 4
+
+
+async def test_brotli(client):
+    response = await client.get("/big", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert int(response.headers["content-length"]) < len(gzip.compress(BODY))
+    assert response.content == BODY
+
+
+@pytest.mark.parametrize("path,headers", [
+    ("/small", {"Accept-Encoding": "gzip"}),
+    ("/big", {"Accept-Encoding": "identity"}),
+    ("/download", {"Accept-Encoding": "gzip"}),
+])
+async def test_passthrough(client, path, headers):
+    response = await client.get(path, headers=headers)
+    assert "content-encoding" not in response.headers
+
+
+async def test_streamed_bodies_are_compressed_incrementally(client):
+    response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content.splitlines()[-1] == b'{"n":99}'
+
+
+async def test_app_compresses_list_responses(api, db):
+    await db.status_checks.insert_many([{"id": str(i), "client_name": "web" * 5} for i in range(100)])
+    response = await api.get("/status", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 100
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import server
+from database import MongoConnection, client_options_from_env
+
+pytestmark = pytest.mark.anyio
+
+UNREACHABLE = {"serverSelectionTimeoutMS": 100, "connectTimeoutMS": 100}
+
+
+def test_import_creates_no_client_or_threads():
+    env = {k: v for k, v in os.environ.items() if k not in ("MONGO_URL", "DB_NAME")}
+    check = (
+        "import threading, server; "
+        "assert server.mongo.client is None and server.db is None; "
+        "assert threading.active_count() == 1, threading.enumerate()"
+    )
+    subprocess.run([sys.executable, "-c", check], cwd=os.path.dirname(server.__file__), env=env, check=True)
+
+
+def test_pool_options_from_env(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "20")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "2")
+    options = client_options_from_env()
+    assert options["maxPoolSize"] == 20
+    assert options["minPoolSize"] == 2
+
+
+async def test_failed_warm_up_is_reported_not_raised():
+    connection = MongoConnection("mongodb://127.0.0.1:1", "test", options=UNREACHABLE)
+    await connection.connect()
+    try:
+        assert not connection.ready
+        report = await connection.health()
+        assert report["status"] == "unavailable"
+        assert report["mongo"]["error"]
+    finally:
+        connection.close()
+
+
+async def test_health_endpoint_returns_503_when_unready(api, monkeypatch):
+    monkeypatch.setattr(server, "mongo", MongoConnection("mongodb://127.0.0.1:1", "test", options=UNREACHABLE))
+    response = await api.get("/health")
+    assert response.status_code == 503
+    assert response.json()["mongo"]["pool"]["open_connections"] == 0
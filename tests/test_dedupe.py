@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+import server
+from dedupe import LruDuplicateFilter, RotatingBloomFilter, fingerprint
+
+pytestmark = pytest.mark.anyio
+
+CONTACT = {"name": "Jane Doe", "email": "jane@example.com", "message": "Hello there, friend!"}
+
+
+def test_fingerprint_ignores_trivial_differences():
+    assert fingerprint("Jane+site@Example.com", "hello   THERE friend") == fingerprint(
+        "jane@example.com", "Hello there, friend!")
+    assert fingerprint("jane@example.com", "Hello there, friend!") != fingerprint(
+        "john@example.com", "Hello there, friend!")
+    assert fingerprint("jane@example.com", "Hello there, friend!") != fingerprint(
+        "jane@example.com", "Hello there, enemy!")
+
+
+@pytest.mark.parametrize("make", [lambda: LruDuplicateFilter(window=60), lambda: RotatingBloomFilter(window=60)])
+def test_rejects_within_window_only(make):
+    dup = make()
+    key = fingerprint("jane@example.com", "hi")
+
+    assert not dup.check_and_add(key, now=0)
+    assert dup.check_and_add(key, now=30)
+    # Bloom generations keep a fingerprint for one to two windows
+    assert not dup.check_and_add(key, now=200)
+    assert dup.stats()["rejected"] == 1
+
+
+def test_bloom_is_sized_from_budgets():
+    dup = RotatingBloomFilter(fp_rate=1e-3, max_bytes=64 * 1024)
+    # 256 Kibit per generation at 0.1% false positives
+    assert 18000 < dup.capacity < 18500
+    assert dup.hashes == 10
+    assert dup.stats()["memory_bytes"] == 64 * 1024
+
+
+def test_bloom_rotates_early_when_full():
+    dup = RotatingBloomFilter(fp_rate=1e-2, max_bytes=128)
+    keys = [fingerprint(f"user{i}@example.com", "hi") for i in range(3 * dup.capacity)]
+    false_positives = sum(dup.check_and_add(key, now=0) for key in keys)
+
+    assert dup.early_rotations >= 2
+    # Two live generations at 1% each
+    assert false_positives <= 0.02 * len(keys) + 3
+
+
+def test_lru_is_bounded():
+    dup = LruDuplicateFilter(max_entries=2)
+    for i in range(3):
+        dup.check_and_add(fingerprint(f"user{i}@example.com", "hi"), now=0)
+
+    assert dup.stats()["entries"] == 2
+    assert dup.evictions == 1
+    assert not dup.check_and_add(fingerprint("user0@example.com", "hi"), now=1)
+
+
+async def test_duplicate_submission_is_rejected_before_insert(api, db):
+    assert (await api.post("/contact", json=CONTACT)).status_code == 200
+    resubmit = dict(CONTACT, message="hello there friend", email="Jane@example.com")
+    response = await api.post("/contact", json=resubmit)
+
+    assert response.status_code == 409
+    assert await db.contacts.count_documents({}) == 1
+    assert server.duplicate_filter.stats()["rejected"] == 1
+
+
+async def test_concurrent_copies_are_rejected(api, db, monkeypatch):
+    insert_document = server.insert_document
+
+    async def slow_insert(collection_name, document):
+        await asyncio.sleep(0.05)
+        await insert_document(collection_name, document)
+
+    monkeypatch.setattr(server, "insert_document", slow_insert)
+    responses = await asyncio.gather(*(api.post("/contact", json=CONTACT) for _ in range(3)))
+
+    assert sorted(r.status_code for r in responses) == [200, 409, 409]
+    assert await db.contacts.count_documents({}) == 1
+    assert server.duplicate_filter.stats()["in_flight"] == 0
+
+
+async def test_failed_insert_releases_its_reservation(api, db, monkeypatch):
+    insert_document = server.insert_document
+    failures = [ConnectionError("mongo down")]
+
+    async def fails_once(collection_name, document):
+        if failures:
+            raise failures.pop()
+        await insert_document(collection_name, document)
+
+    monkeypatch.setattr(server, "insert_document", fails_once)
+    assert (await api.post("/contact", json=CONTACT)).status_code == 500
+    assert (await api.post("/contact", json=CONTACT)).status_code == 200
+    assert (await api.post("/contact", json=CONTACT)).status_code == 409
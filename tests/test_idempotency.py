@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+from idempotency import IDEMPOTENCY_COLLECTION, IdempotencyStore
+
+pytestmark = pytest.mark.anyio
+
+CONTACT = {"name": "Jane Doe", "email": "jane@example.com", "message": "Hello there friend"}
+
+
+@pytest.fixture
+def store(db):
+    """The app's store, reading the mock database, with an empty LRU."""
+    server.idempotency_store._entries.clear()
+    return server.idempotency_store
+
+
+async def test_replay_returns_the_original_response(api, db, store):
+    headers = {"Idempotency-Key": "k1"}
+    first = await api.post("/status", json={"client_name": "web"}, headers=headers)
+    second = await api.post("/status", json={"client_name": "web"}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert await db.status_checks.count_documents({}) == 1
+    record = await db[IDEMPOTENCY_COLLECTION].find_one()
+    assert record["state"] == "done" and record["expires_at"] > datetime.utcnow()
+
+
+async def test_replays_do_not_use_rate_limit_budget(api, db, store):
+    responses = [await api.post("/contact", json=CONTACT, headers={"Idempotency-Key": "k2"}) for _ in range(8)]
+
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert await db.contacts.count_documents({}) == 1
+
+
+async def test_concurrent_requests_collapse_into_one_write(api, db, store):
+    responses = await asyncio.gather(*(
+        api.post("/contact", json=CONTACT, headers={"Idempotency-Key": "k3"}) for _ in range(5)
+    ))
+
+    assert [response.status_code for response in responses] == [200] * 5
+    assert await db.contacts.count_documents({}) == 1
+
+
+async def test_waiters_share_the_in_flight_result(db):
+    store = IdempotencyStore(lambda: db[IDEMPOTENCY_COLLECTION])
+    calls = 0
+
+    async def execute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 201, "application/json", b'{"ok":true}'
+
+    results = await asyncio.gather(*(store.run("k", "hash", execute) for _ in range(5)))
+
+    assert calls == 1
+    assert [replayed for _, replayed in results] == [False] + [True] * 4
+    assert {stored.body for stored, _ in results} == {b'{"ok":true}'}
+    assert store.stats()["collapsed"] == 4
+
+
+async def test_key_reused_with_another_body_is_rejected(api, db, store):
+    headers = {"Idempotency-Key": "k4"}
+    await api.post("/status", json={"client_name": "web"}, headers=headers)
+    response = await api.post("/status", json={"client_name": "cli"}, headers=headers)
+    assert response.status_code == 422
+
+
+async def test_other_worker_result_is_replayed_from_mongo(api, db, store):
+    headers = {"Idempotency-Key": "k5"}
+    first = await api.post("/status", json={"client_name": "web"}, headers=headers)
+    # A fresh process has an empty LRU but shares the collection
+    server.idempotency_store._entries.clear()
+
+    second = await api.post("/status", json={"client_name": "web"}, headers=headers)
+    assert second.json() == first.json()
+    assert await db.status_checks.count_documents({}) == 1
+
+
+async def test_abandoned_pending_key_is_taken_over(api, db, store):
+    key = "POST /api/status k6"
+    past = datetime.utcnow() - timedelta(seconds=5)
+    request_hash = hashlib.blake2b(b'{"client_name":"web"}', digest_size=16).hexdigest()
+    await db[IDEMPOTENCY_COLLECTION].insert_one({
+        "_id": key, "request_hash": request_hash, "state": "pending", "locked_until": past,
+        "expires_at": datetime.utcnow() + timedelta(days=1),
+    })
+
+    response = await api.post("/status", content=b'{"client_name":"web"}',
+                              headers={"Idempotency-Key": "k6", "Content-Type": "application/json"})
+    assert response.status_code == 200
+    assert (await db[IDEMPOTENCY_COLLECTION].find_one({"_id": key}))["state"] == "done"
+
+
+async def test_failed_requests_are_not_stored(api, db, store, monkeypatch):
+    insert_document = server.insert_document
+    attempts = []
+
+    async def fails_once(collection_name, document):
+        attempts.append(collection_name)
+        if len(attempts) == 1:
+            raise RuntimeError("database down")
+        await insert_document(collection_name, document)
+
+    monkeypatch.setattr(server, "insert_document", fails_once)
+    headers = {"Idempotency-Key": "k7"}
+    assert (await api.post("/contact", json=CONTACT, headers=headers)).status_code == 500
+    assert await db[IDEMPOTENCY_COLLECTION].count_documents({}) == 0
+
+    assert (await api.post("/contact", json=CONTACT, headers=headers)).status_code == 200
+    assert await db.contacts.count_documents({}) == 1
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+from indexes import INDEXES, ensure_indexes, find_collscans, plan_stages
+from notifications import PENDING_SORT, pending_query
+from pagination import encode_cursor, keyset_filter, keyset_sort
+from retention import archive_sort, expired_filter, policies_from_env
+from search import build_contact_search
+
+pytestmark = pytest.mark.anyio
+
+
+def test_plan_stages_walks_nested_plans():
+    plan = {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+    assert list(plan_stages(plan)) == ["LIMIT", "FETCH", "IXSCAN"]
+
+
+async def test_ensure_indexes_is_idempotent(db):
+    await ensure_indexes(db)
+    await ensure_indexes(db)
+    for collection, models in INDEXES.items():
+        existing = await db[collection].index_information()
+        for model in models:
+            assert model.document["name"] in existing
+
+
+async def test_no_route_query_does_a_collscan(live_db):
+    await ensure_indexes(live_db)
+    assert await find_collscans(live_db) == []
+
+
+SEARCH_SHAPES = [
+    {"q": "consultation"},
+    {"q": "consultation", "status": "new"},
+    {"status": "read"},
+    {"status": "new", "created_from": datetime(2025, 1, 1), "created_to": datetime(2025, 2, 1)},
+    {"email": "jane@example.com"},
+    {"email_domain": "example.com"},
+    {"created_from": datetime(2025, 1, 1)},
+]
+
+
+async def test_search_queries_use_indexes(live_db):
+    await ensure_indexes(live_db)
+    await live_db.contacts.insert_many([
+        {"id": str(i), "name": "Jane Doe", "email": f"jane{i}@example.com", "status": "new",
+         "message": "Could we schedule a consultation?", "created_at": datetime(2025, 1, 1 + i % 28)}
+        for i in range(200)
+    ])
+    queries = []
+    for shape in SEARCH_SHAPES:
+        search = build_contact_search(**shape)
+        queries.append(("contacts", search.filter, search.sort))
+    assert await find_collscans(live_db, queries) == []
+
+
+def route_query_shapes():
+    """The filters the keyset pages, events replay, exports, retention, notifier and
+    triage issue, built from the same helpers those code paths use."""
+    cursor = encode_cursor(datetime(2025, 1, 15), "100")
+    start, end = datetime(2025, 1, 1), datetime(2025, 2, 1)
+    shapes = [
+        ("status_checks", keyset_filter("timestamp", cursor, False), keyset_sort("timestamp", False)),
+        ("contacts", keyset_filter("created_at", cursor, True), keyset_sort("created_at", True)),
+        ("contacts", keyset_filter("created_at", cursor, False), keyset_sort("created_at", False)),
+        ("status_checks", server.time_range("timestamp", start, end), keyset_sort("timestamp", False)),
+        ("status_checks", {**server.time_range("timestamp", start, end), "client_name": "web"},
+         keyset_sort("timestamp", False)),
+        ("contacts", server.time_range("created_at", start, end), keyset_sort("created_at", False)),
+        ("contacts", {**server.time_range("created_at", start, end), "status": "replied"},
+         keyset_sort("created_at", False)),
+        ("contacts", pending_query(datetime(2025, 1, 15), "100", end), PENDING_SORT),
+        ("contacts", {"id": {"$in": ["1", "2", "3"]}}, []),
+    ]
+    for policy in policies_from_env():
+        policy = policy._replace(retention=timedelta(days=30))
+        shapes.append((policy.collection, expired_filter(policy, end), archive_sort(policy)))
+    return shapes
+
+
+async def test_route_query_shapes_are_valid_queries(db):
+    shapes = route_query_shapes()
+    assert {collection for collection, _, _ in shapes} == {"status_checks", "contacts"}
+    for collection, query, sort in shapes:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        assert await cursor.to_list(1) == []
+
+
+async def test_route_query_shapes_use_indexes(live_db):
+    await ensure_indexes(live_db)
+    await live_db.contacts.insert_many([
+        {"id": str(i), "name": "Jane Doe", "email": f"jane{i}@example.com", "status": ("new", "read", "replied")[i % 3],
+         "message": "Hello", "created_at": datetime(2025, 1, 1 + i % 28)}
+        for i in range(200)
+    ])
+    await live_db.status_checks.insert_many([
+        {"id": str(i), "client_name": ("web", "mobile")[i % 2], "timestamp": datetime(2025, 1, 1 + i % 28)}
+        for i in range(200)
+    ])
+    assert await find_collscans(live_db, route_query_shapes()) == []
@@ -0,0 +1,82 @@
+import io
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from log_pipeline import LogPipeline, RepeatSampler, RequestContextMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def pipeline():
+    stream = io.StringIO()
+    pipeline = LogPipeline(level="INFO", stream=stream, sampler=RepeatSampler(burst=2, window=60))
+    pipeline.start()
+    yield pipeline
+    pipeline.stop()
+
+
+def records(pipeline):
+    pipeline.stop()
+    return [json.loads(line) for line in pipeline.stream.getvalue().splitlines()]
+
+
+def test_records_are_written_as_json_off_thread(pipeline):
+    logging.getLogger("portfolio").info("hello %s", "world")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("portfolio").exception("failed")
+
+    hello, failed = records(pipeline)
+    assert hello["message"] == "hello world"
+    assert hello["level"] == "INFO"
+    assert failed["message"] == "failed"
+    assert "ValueError: boom" in failed["exception"]
+
+
+def test_repeated_errors_are_sampled(pipeline):
+    for i in range(5):
+        logging.getLogger("portfolio").error("Contact submission error: %s", i)
+    logging.getLogger("portfolio").warning("different message")
+
+    logged = records(pipeline)
+    assert [r["message"] for r in logged] == [
+        "Contact submission error: 0", "Contact submission error: 1", "different message",
+    ]
+    assert pipeline.sampler.total_suppressed == 3
+
+
+def test_stop_restores_handlers():
+    root = logging.getLogger()
+    before = root.handlers[:]
+    pipeline = LogPipeline(stream=io.StringIO())
+    pipeline.start()
+    assert root.handlers != before
+    pipeline.stop()
+    assert root.handlers == before
+
+
+async def test_request_context_reaches_handler_logs(pipeline):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        logging.getLogger("portfolio").info("looking up %s", item_id)
+        return {}
+
+    app.add_middleware(RequestContextMiddleware)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/items/7", headers={"X-Request-ID": "req-1"})
+    assert response.headers["x-request-id"] == "req-1"
+
+    handler_log, access_log = [r for r in records(pipeline) if r["logger"] in ("portfolio", "access")]
+    assert handler_log["request_id"] == "req-1"
+    assert handler_log["route"] == "/items/{item_id}"
+    assert access_log["status"] == 200
+    assert access_log["route"] == "/items/{item_id}"
+    assert access_log["latency_ms"] >= 0
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+import server
+from metrics import Histogram, Metrics, MetricsMiddleware, MongoCommandTimer
+
+pytestmark = pytest.mark.anyio
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.5):
+        histogram.observe(value)
+    lines = histogram.render("x", 'route="/"')
+    assert 'x_bucket{route="/",le="0.01"} 1' in lines
+    assert 'x_bucket{route="/",le="0.1"} 2' in lines
+    assert 'x_bucket{route="/",le="+Inf"} 3' in lines
+    assert 'x_count{route="/"} 3' in lines
+
+
+def test_command_timer_records_by_collection():
+    metrics = Metrics()
+    timer = MongoCommandTimer(metrics)
+    timer.started(SimpleNamespace(command_name="find", command={"find": "contacts"}, connection_id=("h", 1), request_id=7))
+    timer.succeeded(SimpleNamespace(command_name="find", connection_id=("h", 1), request_id=7, duration_micros=1500))
+    timer.started(SimpleNamespace(command_name="insert", command={"insert": "status_checks"}, connection_id=("h", 1), request_id=8))
+    timer.failed(SimpleNamespace(command_name="insert", connection_id=("h", 1), request_id=8, duration_micros=100))
+
+    assert metrics.mongo_latency[("contacts", "find")].count == 1
+    assert metrics.mongo_failures == {("status_checks", "insert"): 1}
+    assert 'mongodb_command_duration_seconds_count{collection="contacts",command="find"} 1' in metrics.render()
+
+
+async def test_middleware_labels_route_templates():
+    metrics = Metrics()
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/items/1")
+        await client.get("/items/2")
+        await client.get("/missing")
+
+    assert metrics.request_latency[("GET", "/items/{item_id}")].count == 2
+    assert metrics.responses[("GET", "unmatched", 404)] == 1
+    assert metrics.in_flight == 0
+
+
+async def test_metrics_endpoint(api, monkeypatch):
+    assert (await api.get("/metrics")).status_code == 404
+
+    monkeypatch.setattr(server, "metrics", Metrics())
+    response = await api.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "http_requests_in_flight 0" in response.text
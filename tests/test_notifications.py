@@ -0,0 +1,127 @@
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+
+import server
+from notifications import STATE_ID, ContactNotifier, SmtpSender, SmtpSettings
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2025, 1, 1)
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content.decode())
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    inbox = Inbox()
+    controller = Controller(inbox, hostname="127.0.0.1", port=port)
+    controller.start()
+    settings = SmtpSettings(host="127.0.0.1", port=port, username=None, password=None, starttls=False,
+                            sender="site@example.com", recipient="me@example.com")
+    yield inbox, SmtpSender(settings)
+    controller.stop()
+
+
+async def seed(db, count, start=START):
+    await db.notification_state.update_one(
+        {"_id": STATE_ID}, {"$setOnInsert": {"checkpoint_at": START, "checkpoint_id": ""}}, upsert=True
+    )
+    await db.contacts.insert_many([
+        {"id": f"{start:%H%M}-{i}", "name": f"Sender {i}", "email": f"s{i}@example.com",
+         "message": f"Message number {i}", "created_at": start + timedelta(minutes=i + 1), "status": "new"}
+        for i in range(count)
+    ])
+
+
+def notifier_for(db, send, **kwargs):
+    return ContactNotifier(db, send, "site@example.com", "me@example.com", settle=0, **kwargs)
+
+
+async def test_digest_covers_pending_contacts_once(db, smtp):
+    inbox, sender = smtp
+    await seed(db, 3)
+    notifier = notifier_for(db, sender)
+
+    assert await notifier.run_once() == 3
+    assert len(inbox.messages) == 1
+    assert "Subject: 3 new portfolio contacts" in inbox.messages[0]
+    assert all(f"Message number {i}" in inbox.messages[0] for i in range(3))
+
+    assert await notifier.run_once() == 0
+    assert len(inbox.messages) == 1
+    state = await db.notification_state.find_one({"_id": STATE_ID})
+    assert state["checkpoint_at"] == START + timedelta(minutes=3)
+    assert state["contacts_sent"] == 3
+
+
+async def test_batches_are_capped(db, smtp):
+    inbox, sender = smtp
+    await seed(db, 5)
+    notifier = notifier_for(db, sender, batch_size=2)
+
+    await notifier._drain()
+    assert len(inbox.messages) == 3
+    assert notifier.contacts_sent == 5
+
+
+async def test_failed_send_keeps_checkpoint(db):
+    await seed(db, 2)
+
+    async def broken(message):
+        raise ConnectionRefusedError("smtp down")
+
+    with pytest.raises(ConnectionRefusedError):
+        await notifier_for(db, broken).run_once()
+
+    state = await db.notification_state.find_one({"_id": STATE_ID})
+    assert state["checkpoint_at"] == START
+    assert state["failures"] == 1
+    assert state["last_error"] == "smtp down"
+
+
+async def test_restart_resumes_from_checkpoint(db, smtp):
+    inbox, sender = smtp
+    await seed(db, 2)
+    await notifier_for(db, sender, lease=0).run_once()
+    await seed(db, 1, start=START + timedelta(hours=1))
+
+    # A fresh worker (as after a restart) only mails what came after the checkpoint
+    assert await notifier_for(db, sender, lease=0).run_once() == 1
+    assert "Message number 0" in inbox.messages[1]
+    assert "Sender 1" not in inbox.messages[1]
+
+
+async def test_live_lease_blocks_other_workers(db, smtp):
+    inbox, sender = smtp
+    await seed(db, 1)
+    await notifier_for(db, sender).run_once()
+    await seed(db, 1, start=START + timedelta(hours=1))
+
+    assert await notifier_for(db, sender).run_once() == 0
+    assert len(inbox.messages) == 1
+
+
+async def test_contact_submission_only_wakes_the_worker(api, db, monkeypatch):
+    async def never_called(message):
+        raise AssertionError("the request path must not send mail")
+
+    notifier = notifier_for(db, never_called)
+    monkeypatch.setattr(server, "notifier", notifier)
+
+    response = await api.post("/contact", json={"name": "Jane Doe", "email": "jane@example.com",
+                                                "message": "Hello there friend"})
+    assert response.status_code == 200
+    assert notifier._wake.is_set()
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor, keyset_filter
+
+pytestmark = pytest.mark.anyio
+
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(BASE_TIME, "abc")
+    assert decode_cursor(cursor) == (BASE_TIME, "abc")
+
+
+def test_invalid_cursor_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        keyset_filter("timestamp", "e30", descending=False)
+
+
+async def seed_status_checks(db, count):
+    await db.status_checks.insert_many([
+        {"id": f"{i:04d}", "client_name": f"client {i}", "timestamp": BASE_TIME + timedelta(seconds=i // 2)}
+        for i in range(count)
+    ])
+
+
+async def test_status_pages_cover_every_document_once(api, db):
+    await seed_status_checks(db, 25)
+
+    seen, after = [], None
+    while True:
+        params = {"limit": 10}
+        if after:
+            params["after"] = after
+        response = await api.get("/status", params=params)
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        after = response.headers.get("X-Next-Cursor")
+        if not after:
+            break
+
+    assert seen == [f"{i:04d}" for i in range(25)]
+
+
+async def test_status_bad_cursor_is_400(api, db):
+    response = await api.get("/status", params={"after": "garbage"})
+    assert response.status_code == 400
+
+
+async def test_status_ndjson_stream(api, db):
+    await seed_status_checks(db, 5)
+    first = (await api.get("/status", params={"limit": 2})).headers["X-Next-Cursor"]
+
+    response = await api.get("/status", params={"format": "ndjson", "after": first})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert len(lines) == 3
+    assert '"id":"0002"' in lines[0].replace(" ", "")
+
+
+async def test_contacts_paginate_newest_first(api, db):
+    await db.contacts.insert_many([
+        {"id": f"c{i}", "name": "Jane Doe", "email": "jane@example.com",
+         "message": "hello there, long enough", "status": "new",
+         "created_at": BASE_TIME + timedelta(minutes=i)}
+        for i in range(3)
+    ])
+
+    page = await api.get("/contacts", params={"limit": 2})
+    assert [c["id"] for c in page.json()] == ["c2", "c1"]
+
+    rest = await api.get("/contacts", params={"limit": 2, "after": page.headers["X-Next-Cursor"]})
+    assert [c["id"] for c in rest.json()] == ["c0"]
+    assert "X-Next-Cursor" not in rest.headers
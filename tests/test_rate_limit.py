@@ -0,0 +1,110 @@
+import time
+from unittest import mock
+
+import mongomock
+import pytest
+from limits import parse
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from rate_limit import LocalSlidingWindowStorage, MongoBucketStorage, limiter_storage_config
+
+FIVE_PER_MINUTE = parse("5/minute")
+
+
+@pytest.fixture(params=["local", "mongo"])
+def storage(request):
+    if request.param == "local":
+        return LocalSlidingWindowStorage()
+    return MongoBucketStorage(collection=mongomock.MongoClient().db.rate_limits)
+
+
+def test_allows_limit_then_blocks(storage):
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    results = [limiter.hit(FIVE_PER_MINUTE, "1.2.3.4") for _ in range(6)]
+    assert results == [True] * 5 + [False]
+    assert limiter.hit(FIVE_PER_MINUTE, "5.6.7.8")
+
+
+def test_previous_window_is_weighted(storage):
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    # Fill the window ending at t=120, then move a quarter into the next one:
+    # 75% of the previous 5 hits still count (3.75), so only two more fit.
+    with mock.patch("rate_limit.time.time", return_value=119.0):
+        for _ in range(5):
+            assert limiter.hit(FIVE_PER_MINUTE, "k")
+    with mock.patch("rate_limit.time.time", return_value=135.0):
+        assert limiter.hit(FIVE_PER_MINUTE, "k")
+        assert limiter.hit(FIVE_PER_MINUTE, "k")
+        assert not limiter.hit(FIVE_PER_MINUTE, "k")
+
+
+def test_shared_storage_counts_across_workers():
+    collection = mongomock.MongoClient().db.rate_limits
+    workers = [SlidingWindowCounterRateLimiter(MongoBucketStorage(collection=collection)) for _ in range(3)]
+    results = [workers[i % 3].hit(FIVE_PER_MINUTE, "ip") for i in range(6)]
+    assert results.count(True) == 5
+    assert "expireAt_1" in collection.index_information()
+
+
+def test_local_storage_evicts_idle_keys():
+    storage = LocalSlidingWindowStorage(max_keys=3)
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    for ip in ["a", "b", "c", "d"]:
+        limiter.hit(FIVE_PER_MINUTE, ip)
+    assert len(storage) == 3
+    assert storage.evictions == 1
+
+
+def test_unknown_storage_kind():
+    with pytest.raises(ValueError):
+        limiter_storage_config("redis", None, "db")
+
+
+class CountingCollection:
+    """Proxy counting the calls (round trips) made on a collection."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.calls = []
+
+    def __getattr__(self, name):
+        attr = getattr(self.collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self.calls.append(name)
+            return attr(*args, **kwargs)
+        return call
+
+
+def test_mongo_hit_is_one_round_trip():
+    collection = CountingCollection(mongomock.MongoClient().db.rate_limits)
+    limiter = SlidingWindowCounterRateLimiter(MongoBucketStorage(collection=collection))
+    limiter.hit(FIVE_PER_MINUTE, "ip")
+    collection.calls.clear()
+    for _ in range(4):
+        assert limiter.hit(FIVE_PER_MINUTE, "ip")
+    assert collection.calls == ["find_one_and_update"] * 4
+    collection.calls.clear()
+    # A rejected hit also gives its slot back
+    assert not limiter.hit(FIVE_PER_MINUTE, "ip")
+    assert collection.calls == ["find_one_and_update", "update_one"]
+    assert limiter.get_window_stats(FIVE_PER_MINUTE, "ip").remaining == 0
+
+
+def test_mongo_storage_fails_open():
+    storage = MongoBucketStorage(mongo_url="mongodb://127.0.0.1:1", timeout_ms=50, failure_backoff=60)
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    start = time.monotonic()
+    assert all(limiter.hit(FIVE_PER_MINUTE, "ip") for _ in range(10))
+    # Only the first hit waits for the server selection timeout
+    assert time.monotonic() - start < 1
+    assert storage.failed_open == 10
+    assert storage.last_error
+
+
+def test_mongo_config_bounds_blocking_calls():
+    config = limiter_storage_config("mongo", "mongodb://db", "app", timeout_ms=100)
+    assert config["storage_options"]["timeout_ms"] == 100
+    assert config["swallow_errors"]
@@ -0,0 +1,72 @@
+import pytest
+
+import server
+from response_cache import ResponseCache, etag_matches
+
+pytestmark = pytest.mark.anyio
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"def"', '"abc"')
+
+
+def test_invalidate_skips_entries_computed_before_it():
+    cache = ResponseCache(ttl=60)
+    key = cache.key("contacts", 50, None)
+    cache.invalidate("contacts")
+    cache.put(key, b"[]")
+    assert cache.get(cache.key("contacts", 50, None)) is None
+
+
+def test_lru_bound():
+    cache = ResponseCache(ttl=60, max_entries=2)
+    for limit in (1, 2, 3):
+        cache.put(cache.key("status_checks", limit, None), b"[]")
+    assert cache.get(cache.key("status_checks", 1, None)) is None
+    assert cache.get(cache.key("status_checks", 3, None)) is not None
+
+
+def test_bytes_bound():
+    cache = ResponseCache(ttl=60, max_bytes=10)
+    for limit in (1, 2, 3):
+        cache.put(cache.key("contacts", limit, None), b"x" * 4)
+    assert cache.get(cache.key("contacts", 1, None)) is None
+    assert cache.get(cache.key("contacts", 3, None)) is not None
+    assert cache.stats()["bytes"] == 8
+    # Too large to cache at all, but still returned
+    assert cache.put(cache.key("contacts", 4, None), b"x" * 11).body == b"x" * 11
+    assert cache.stats()["entries"] == 2
+
+
+async def test_repeat_poll_is_served_from_cache(api, db):
+    await api.post("/status", json={"client_name": "first"})
+    first = await api.get("/status")
+    await db.status_checks.insert_one({"id": "sneaky", "client_name": "direct", "timestamp": first.json()[0]["timestamp"]})
+
+    second = await api.get("/status")
+    assert second.content == first.content
+    assert server.response_cache.hits == 1
+
+
+async def test_if_none_match_returns_304(api, db):
+    await api.post("/status", json={"client_name": "etag"})
+    first = await api.get("/status")
+    etag = first.headers["ETag"]
+
+    revalidated = await api.get("/status", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+
+async def test_post_invalidates_list(api, db):
+    await api.post("/status", json={"client_name": "one"})
+    first = await api.get("/status")
+    await api.post("/status", json={"client_name": "two"})
+
+    second = await api.get("/status", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert [s["client_name"] for s in second.json()] == ["one", "two"]
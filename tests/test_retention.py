@@ -0,0 +1,112 @@
+import gzip
+from datetime import datetime, timedelta
+
+import bson
+import orjson
+import pytest
+
+import server
+from retention import RetentionJob, RetentionPolicy, Segment, archive_expired, ensure_ttl_indexes
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime(2025, 6, 1)
+STATUS_POLICY = RetentionPolicy("status_checks", "timestamp", timedelta(days=30))
+CONTACT_POLICY = RetentionPolicy("contacts", "created_at", timedelta(days=30), {"status": "replied"})
+
+
+async def seed(db):
+    await db.status_checks.insert_many([
+        {"id": str(i), "client_name": "web", "timestamp": NOW - timedelta(days=i)} for i in range(60)
+    ])
+    await db.contacts.insert_many([
+        {"id": f"c{i}", "name": "Jane Doe", "email": "jane@example.com", "message": "Hello there friend",
+         "created_at": NOW - timedelta(days=40 + i), "status": status}
+        for i, status in enumerate(["replied", "new", "read", "replied"])
+    ])
+
+
+def read_segments(directory):
+    docs = []
+    for path in sorted(directory.glob("*.ndjson.gz")):
+        with gzip.open(path) as f:
+            docs.extend(orjson.loads(line) for line in f)
+    return docs
+
+
+async def test_archives_then_deletes_expired_status_checks(db, tmp_path):
+    await seed(db)
+    expired_bytes = sum([len(bson.encode(doc)) async for doc in db.status_checks.find(
+        {"timestamp": {"$lt": NOW - timedelta(days=30)}})])
+
+    report = await archive_expired(db, STATUS_POLICY, tmp_path, now=NOW, batch_size=7, segment_size=10)
+
+    assert report["archived"] == report["deleted"] == 29
+    assert report["bytes_reclaimed"] == expired_bytes
+    assert len(report["segments"]) == 3
+    assert report["archive_bytes"] == sum(p.stat().st_size for p in (tmp_path / "status_checks").iterdir())
+    archived = read_segments(tmp_path / "status_checks")
+    assert sorted(int(doc["id"]) for doc in archived) == list(range(31, 60))
+    assert await db.status_checks.count_documents({}) == 31
+    assert not list(tmp_path.rglob("*.part"))
+
+
+async def test_contacts_are_kept_until_replied(db, tmp_path):
+    await seed(db)
+
+    report = await archive_expired(db, CONTACT_POLICY, tmp_path, now=NOW)
+
+    assert report["deleted"] == 2
+    assert [doc["id"] for doc in read_segments(tmp_path / "contacts")] == ["c3", "c0"]
+    assert sorted([doc["id"] async for doc in db.contacts.find()]) == ["c1", "c2"]
+
+
+async def test_runs_in_the_same_second_keep_both_archives(db, tmp_path):
+    expired = NOW - timedelta(days=90)
+    await db.status_checks.insert_one({"id": "a", "client_name": "web", "timestamp": expired})
+    first = await archive_expired(db, STATUS_POLICY, tmp_path, now=NOW)
+    await db.status_checks.insert_one({"id": "b", "client_name": "web", "timestamp": expired})
+    second = await archive_expired(db, STATUS_POLICY, tmp_path, now=NOW)
+
+    assert first["segments"] != second["segments"]
+    assert sorted(doc["id"] for doc in read_segments(tmp_path / "status_checks")) == ["a", "b"]
+
+
+def test_segment_never_overwrites_an_archive(tmp_path):
+    path = tmp_path / "status_checks-0000.ndjson.gz"
+    path.write_bytes(b"archived")
+    segment = Segment(path)
+    segment.write(b"{}\n")
+    with pytest.raises(FileExistsError):
+        segment.commit()
+    assert path.read_bytes() == b"archived"
+
+
+async def test_disabled_policy_is_a_no_op(db, tmp_path):
+    await seed(db)
+    report = await archive_expired(db, RetentionPolicy("status_checks", "timestamp", None), tmp_path, now=NOW)
+    assert report["archived"] == 0
+    assert await db.status_checks.count_documents({}) == 60
+
+
+async def test_ttl_indexes_follow_the_policies(db):
+    await ensure_ttl_indexes(db, [STATUS_POLICY, CONTACT_POLICY], grace=timedelta(days=7))
+    info = await db.contacts.index_information()
+    assert info["created_at_ttl"]["expireAfterSeconds"] == 37 * 86400
+
+    await ensure_ttl_indexes(db, [RetentionPolicy("contacts", "created_at", None)], grace=timedelta(days=7))
+    assert "created_at_ttl" not in await db.contacts.index_information()
+
+
+async def test_run_endpoint_reports_totals(api, db, tmp_path, monkeypatch, admin):
+    assert (await api.post("/retention/run", headers=admin)).status_code == 404
+
+    old = {"id": "old", "client_name": "web", "timestamp": datetime.utcnow() - timedelta(days=90)}
+    await db.status_checks.insert_many([old, {"id": "new", "client_name": "web", "timestamp": datetime.utcnow()}])
+    monkeypatch.setattr(server, "retention_job", RetentionJob(db, [STATUS_POLICY], tmp_path))
+
+    assert (await api.post("/retention/run")).status_code == 401
+    response = await api.post("/retention/run", headers=admin)
+    assert response.status_code == 200
+    assert response.json()["reports"][0]["deleted"] == 1
+    assert (await api.get("/stats")).json()["retention"]["deleted"] == 1
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+import server
+from indexes import ensure_indexes
+from rollups import ROLLUP_COLLECTION, RollupRecorder, backfill, bucket_count, bucket_start, record
+
+pytestmark = pytest.mark.anyio
+
+T0 = datetime(2025, 3, 1, 10, 15, 30)
+
+
+def test_bucket_boundaries():
+    assert bucket_start(T0, "minute") == datetime(2025, 3, 1, 10, 15)
+    assert bucket_start(T0, "hour") == datetime(2025, 3, 1, 10)
+    assert bucket_start(T0, "day") == datetime(2025, 3, 1)
+    assert bucket_count(T0, T0 + timedelta(hours=2), "hour") == 3
+    assert bucket_count(datetime(2025, 3, 1), datetime(2025, 3, 8), "day") == 7
+
+
+async def test_record_increments_every_granularity(db):
+    for offset in (0, 20, 3600):
+        await record(db[ROLLUP_COLLECTION], "web", T0 + timedelta(seconds=offset))
+
+    hours = await db[ROLLUP_COLLECTION].find({"granularity": "hour"}, {"_id": 0}).sort("bucket").to_list(None)
+    assert [(h["bucket"].hour, h["count"]) for h in hours] == [(10, 2), (11, 1)]
+    assert hours[0]["first_seen"] == T0 and hours[0]["last_seen"] == T0 + timedelta(seconds=20)
+    day = await db[ROLLUP_COLLECTION].find_one({"granularity": "day"})
+    assert day["count"] == 3
+    assert await db[ROLLUP_COLLECTION].count_documents({"granularity": "minute"}) == 2
+
+
+async def test_status_checks_feed_the_rollup_endpoint(api, db):
+    start = bucket_start(datetime.utcnow(), "hour")
+    for client_name in ("web", "web", "mobile"):
+        assert (await api.post("/status", json={"client_name": client_name})).status_code == 200
+    await server.rollup_recorder.flush()
+
+    response = await api.get("/status/rollups", params={"start": start.isoformat(), "granularity": "hour"})
+    assert response.status_code == 200
+    assert [(r["client_name"], r["count"]) for r in response.json()] == [("mobile", 1), ("web", 2)]
+
+    response = await api.get("/status/rollups", params={"start": start.isoformat(), "client_name": "web"})
+    assert [r["count"] for r in response.json()] == [2]
+
+
+async def test_recorder_writes_one_bulk_per_flush(db):
+    writes = []
+
+    class Recording:
+        async def bulk_write(self, operations, ordered):
+            writes.append(len(operations))
+            return await db[ROLLUP_COLLECTION].bulk_write(operations, ordered=ordered)
+
+    recorder = RollupRecorder(lambda: Recording(), max_delay=60)
+    for offset in (0, 20, 3600):
+        recorder.add("web", T0 + timedelta(seconds=offset))
+    assert writes == []
+    await recorder.flush()
+
+    # 2 minutes, 2 hours and 1 day bucket
+    assert writes == [5]
+    day = await db[ROLLUP_COLLECTION].find_one({"granularity": "day"})
+    assert day["count"] == 3 and day["last_seen"] == T0 + timedelta(seconds=3600)
+
+
+async def test_status_check_succeeds_when_rollups_fail(api, db, monkeypatch, caplog):
+    class Unavailable:
+        async def bulk_write(self, operations, ordered):
+            raise AutoReconnect("mongo down")
+
+    monkeypatch.setattr(server, "rollup_recorder", RollupRecorder(lambda: Unavailable()))
+    assert (await api.post("/status", json={"client_name": "web"})).status_code == 200
+    await server.rollup_recorder.flush()
+
+    assert server.rollup_recorder.stats()["updates_dropped"] == 3
+    assert "backfill" in caplog.text
+    assert await db.status_checks.count_documents({}) == 1
+
+
+async def test_backfill_needs_a_bounded_range(api, db, admin):
+    params = {"start": "2025-01-01T00:00:00", "end": "2025-06-01T00:00:00"}
+    assert (await api.post("/status/rollups/backfill", params=params)).status_code == 401
+    assert (await api.post("/status/rollups/backfill", headers=admin)).status_code == 422
+    assert (await api.post("/status/rollups/backfill", params=params, headers=admin)).status_code == 400
+
+    params["end"] = "2025-01-02T00:00:00"
+    async with server.rollup_backfill_lock:
+        assert (await api.post("/status/rollups/backfill", params=params, headers=admin)).status_code == 409
+
+
+async def test_rollup_ranges_accept_utc_offsets(api, db, admin):
+    await db[ROLLUP_COLLECTION].insert_one({"granularity": "hour", "client_name": "web", "count": 1,
+                                            "bucket": bucket_start(T0, "hour"), "first_seen": T0, "last_seen": T0})
+    response = await api.get("/status/rollups", params={"start": "2025-03-01T00:00:00Z", "granularity": "day"})
+    assert response.status_code == 200
+    assert response.json() == []
+    response = await api.get("/status/rollups", params={"start": "2025-03-01T00:00:00Z", "end": "2025-03-02T00:00:00"})
+    assert [r["count"] for r in response.json()] == [1]
+    # 12:00+02:00 is 10:00 UTC, so the 10:00 bucket is excluded
+    params = {"start": "2025-03-01T09:00:00", "end": "2025-03-01T12:00:00+02:00"}
+    assert (await api.get("/status/rollups", params=params)).json() == []
+
+    # Mixed offsets are compared, not rejected with a TypeError
+    params = {"start": "2025-03-02T00:00:00Z", "end": "2025-03-01T00:00:00"}
+    assert (await api.post("/status/rollups/backfill", params=params, headers=admin)).status_code == 400
+
+
+async def test_rollup_range_is_bounded(api, db):
+    params = {"start": "2020-01-01T00:00:00", "end": "2025-01-01T00:00:00", "granularity": "minute"}
+    assert (await api.get("/status/rollups", params=params)).status_code == 400
+
+
+async def test_backfill_matches_incremental_counts(live_db):
+    await ensure_indexes(live_db)
+    checks = [{"id": str(i), "client_name": "web" if i % 3 else "mobile", "timestamp": T0 + timedelta(minutes=7 * i)}
+              for i in range(40)]
+    await live_db.status_checks.insert_many(checks)
+    for check in checks:
+        await record(live_db["incremental"], check["client_name"], check["timestamp"])
+
+    written = await backfill(live_db)
+    assert sum(written.values()) == await live_db[ROLLUP_COLLECTION].count_documents({})
+
+    def counts(docs):
+        return sorted((d["granularity"], d["client_name"], d["bucket"], d["count"]) for d in docs)
+
+    assert counts(await live_db[ROLLUP_COLLECTION].find().to_list(None)) == counts(
+        await live_db["incremental"].find().to_list(None))
+    # Repeating a backfill over a range replaces rather than adds
+    await backfill(live_db, T0, T0 + timedelta(hours=1))
+    assert counts(await live_db[ROLLUP_COLLECTION].find().to_list(None)) == counts(
+        await live_db["incremental"].find().to_list(None))
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+
+from search import TEXT_SCORE, build_contact_search
+
+pytestmark = pytest.mark.anyio
+
+
+def test_text_query_ranks_by_score():
+    search = build_contact_search(q="hello", status="new")
+    assert search.filter == {"$text": {"$search": "hello"}, "status": "new"}
+    assert search.sort[0] == ("score", TEXT_SCORE)
+    assert search.projection == {"score": TEXT_SCORE}
+
+
+def test_filters_combine():
+    search = build_contact_search(
+        email_domain="@Example.com", created_from=datetime(2025, 1, 1), created_to=datetime(2025, 2, 1)
+    )
+    assert search.filter == {
+        "email": {"$regex": r"@example\.com$"},
+        "created_at": {"$gte": datetime(2025, 1, 1), "$lt": datetime(2025, 2, 1)},
+    }
+    assert search.sort == [("created_at", -1), ("id", -1)]
+    assert search.projection == {}
+
+
+async def seed(db):
+    await db.contacts.insert_many([
+        {"id": "a", "name": "Ann Lee", "email": "ann@acme.io", "message": "Project inquiry here",
+         "created_at": datetime(2025, 1, 1), "status": "new", "ip_address": None, "user_agent": None},
+        {"id": "b", "name": "Bob Ray", "email": "bob@example.com", "message": "Another project inquiry",
+         "created_at": datetime(2025, 1, 5), "status": "read", "ip_address": None, "user_agent": None},
+        {"id": "c", "name": "Cat Poe", "email": "cat@acme.io", "message": "Hiring question for you",
+         "created_at": datetime(2025, 1, 9), "status": "new", "ip_address": None, "user_agent": None},
+    ])
+
+
+async def test_search_endpoint_filters(api, db):
+    await seed(db)
+
+    by_domain = await api.get("/contacts/search", params={"email_domain": "acme.io"})
+    assert [c["id"] for c in by_domain.json()] == ["c", "a"]
+
+    by_status_and_date = await api.get("/contacts/search", params={
+        "status": "new", "created_from": "2025-01-02T00:00:00",
+    })
+    assert [c["id"] for c in by_status_and_date.json()] == ["c"]
+
+    by_email = await api.get("/contacts/search", params={"email": "bob@example.com"})
+    assert [c["id"] for c in by_email.json()] == ["b"]
+    assert "_id" not in by_email.json()[0]
+
+
+async def test_search_paginates_without_q(api, db):
+    await seed(db)
+    first = await api.get("/contacts/search", params={"limit": 2})
+    rest = await api.get("/contacts/search", params={"limit": 2, "after": first.headers["X-Next-Cursor"]})
+    assert [c["id"] for c in first.json() + rest.json()] == ["c", "b", "a"]
+
+
+async def test_search_rejects_cursor_with_text_query(api, db):
+    response = await api.get("/contacts/search", params={"q": "project", "after": "abc"})
+    assert response.status_code == 400
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+import pytest
+
+import server
+from serializers import ModelSerializer, ProjectedSerializer, make_serializer
+
+pytestmark = pytest.mark.anyio
+
+CONTACT_DOC = {
+    "id": "c1", "name": "Jane Doe", "email": "jane@example.com", "message": "Hello there friend",
+    "created_at": datetime(2025, 3, 4, 5, 6, 7, 891000), "status": "new",
+    "ip_address": "127.0.0.1", "user_agent": None,
+}
+
+
+def test_fast_path_matches_model_path():
+    for serializer_cls in (ModelSerializer, ProjectedSerializer):
+        assert serializer_cls(server.Contact).dump([CONTACT_DOC]) == ModelSerializer(server.Contact).dump([CONTACT_DOC])
+    assert ProjectedSerializer(server.Contact).dump_line(CONTACT_DOC) == ModelSerializer(server.Contact).dump_line(CONTACT_DOC)
+
+
+def test_projection_drops_object_id():
+    projection = ProjectedSerializer(server.StatusCheck).projection
+    assert projection == {"_id": 0, "id": 1, "client_name": 1, "timestamp": 1}
+    assert ModelSerializer(server.StatusCheck).projection is None
+
+
+def test_unknown_serializer():
+    with pytest.raises(ValueError):
+        make_serializer("pickle", server.Contact)
+
+
+@pytest.mark.parametrize("name", ["model", "fast"])
+async def test_routes_with_either_serializer(api, db, monkeypatch, name):
+    monkeypatch.setattr(server, "contact_serializer", make_serializer(name, server.Contact))
+    await db.contacts.insert_one(dict(CONTACT_DOC))
+
+    response = await api.get("/contacts")
+    assert response.status_code == 200
+    assert response.json()[0]["created_at"] == "2025-03-04T05:06:07.891000"
+    assert "_id" not in response.json()[0]
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytest
+
+import server
+from triage import apply_triage
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed(db, statuses):
+    await db.contacts.insert_many([
+        {"id": contact_id, "name": "Jane Doe", "email": "jane@example.com", "message": "Hello there friend",
+         "created_at": datetime(2025, 1, 1), "status": status}
+        for contact_id, status in statuses.items()
+    ])
+
+
+async def test_mixed_batch_reports_each_id(db):
+    await seed(db, {"a": "new", "b": "read", "c": "replied", "d": "new"})
+
+    results = await apply_triage(db.contacts, [
+        ("a", "read"), ("b", "replied"), ("c", "new"), ("d", "new"), ("zz", "read"), ("a", "replied"),
+    ])
+
+    assert [r["result"] for r in results] == [
+        "updated", "updated", "invalid_transition", "unchanged", "not_found", "duplicate",
+    ]
+    statuses = {doc["id"]: doc["status"] async for doc in db.contacts.find()}
+    assert statuses == {"a": "read", "b": "replied", "c": "replied", "d": "new"}
+
+
+async def test_concurrent_change_is_a_conflict(db):
+    await seed(db, {"a": "new", "b": "new"})
+
+    class RacingCollection:
+        """Flips "b" to replied between the read and the bulk write."""
+
+        def find(self, *args, **kwargs):
+            return db.contacts.find(*args, **kwargs)
+
+        async def bulk_write(self, operations, ordered):
+            await db.contacts.update_one({"id": "b"}, {"$set": {"status": "replied"}})
+            return await db.contacts.bulk_write(operations, ordered=ordered)
+
+    results = await apply_triage(RacingCollection(), [("a", "read"), ("b", "read")])
+    assert [r["result"] for r in results] == ["updated", "conflict"]
+
+
+async def test_triage_endpoint(api, db, admin):
+    await seed(db, {"a": "new"})
+    await api.get("/contacts")
+
+    response = await api.post("/contacts/triage", json={"updates": [{"id": "a", "status": "read"}]}, headers=admin)
+    assert response.status_code == 200
+    assert response.json()["counts"] == {"updated": 1}
+    assert response.json()["results"][0] == {"id": "a", "result": "updated", "previous_status": "new", "status": "read"}
+    assert (await api.get("/contacts")).json()[0]["status"] == "read"
+
+
+async def test_triage_rejects_unknown_status(api, db, admin):
+    response = await api.post("/contacts/triage", json={"updates": [{"id": "a", "status": "archived"}]},
+                              headers=admin)
+    assert response.status_code == 422
+
+
+async def test_triage_requires_the_admin_token(api, db, monkeypatch):
+    body = {"updates": [{"id": "a", "status": "replied"}]}
+    # Disabled unless ADMIN_TOKEN is set
+    assert (await api.post("/contacts/triage", json=body)).status_code == 404
+
+    monkeypatch.setattr(server, "ADMIN_TOKEN", "secret")
+    assert (await api.post("/contacts/triage", json=body)).status_code == 401
+    assert (await api.post("/contacts/triage", json=body, headers={"Authorization": "Bearer wrong"})).status_code == 401
+    assert (await api.post("/contacts/triage", json=body, headers={"Authorization": "Bearer secret"})).status_code == 200
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import server
+from write_buffer import WriteBuffer
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_flushes_when_batch_is_full(db):
+    buffer = WriteBuffer(db.status_checks, max_batch_size=3, max_delay=60)
+    await asyncio.gather(*(buffer.insert({"id": str(i)}) for i in range(3)))
+
+    assert await db.status_checks.count_documents({}) == 3
+    assert buffer.batches_written == 1
+    assert buffer.last_batch_size == 3
+
+
+async def test_flushes_after_delay(db):
+    buffer = WriteBuffer(db.status_checks, max_batch_size=100, max_delay=0.01)
+    await asyncio.gather(buffer.insert({"id": "a"}), buffer.insert({"id": "b"}))
+
+    assert await db.status_checks.count_documents({}) == 2
+    assert buffer.batches_written == 1
+
+
+async def test_ack_on_enqueue_is_written_by_close(db):
+    buffer = WriteBuffer(db.contacts, max_batch_size=100, max_delay=60)
+    await buffer.insert({"id": "x"}, wait=False)
+    assert buffer.depth == 1
+    assert await db.contacts.count_documents({}) == 0
+
+    await buffer.close()
+    assert buffer.depth == 0
+    assert await db.contacts.count_documents({}) == 1
+    with pytest.raises(RuntimeError):
+        await buffer.insert({"id": "y"})
+
+
+async def test_write_error_reaches_caller(db):
+    class FailingCollection:
+        name = "broken"
+
+        async def insert_many(self, documents, ordered):
+            raise ConnectionError("mongo down")
+
+    buffer = WriteBuffer(FailingCollection(), max_batch_size=1)
+    with pytest.raises(ConnectionError):
+        await buffer.insert({"id": "z"})
+    assert buffer.write_errors == 1
+
+
+async def test_routes_use_buffer_when_enabled(api, db, monkeypatch):
+    buffer = WriteBuffer(db.status_checks, max_batch_size=100, max_delay=0.01)
+    monkeypatch.setitem(server.write_buffers, "status_checks", buffer)
+
+    responses = await asyncio.gather(*(api.post("/status", json={"client_name": f"c{i}"}) for i in range(5)))
+    assert all(r.status_code == 200 for r in responses)
+    assert await db.status_checks.count_documents({}) == 5
+    assert buffer.batches_written == 1
+
+    stats = (await api.get("/stats")).json()
+    assert stats["write_buffers"]["status_checks"]["largest_batch_size"] == 5
+
+
+async def test_enqueue_ack_invalidates_cache_after_flush(api, db, monkeypatch):
+    buffer = WriteBuffer(db.status_checks, max_batch_size=100, max_delay=0.05,
+                         on_flush=lambda docs: server.documents_written("status_checks", docs))
+    monkeypatch.setitem(server.write_buffers, "status_checks", buffer)
+    monkeypatch.setattr(server, "WRITE_BUFFER_ACK", "enqueue")
+
+    assert (await api.post("/status", json={"client_name": "queued"})).status_code == 200
+    # Read before the batch lands: the empty list is cached...
+    assert (await api.get("/status")).json() == []
+    await asyncio.sleep(0.2)
+    # ...but not served once the batch is written
+    assert [s["client_name"] for s in (await api.get("/status")).json()] == ["queued"]
+    # which is also when the check is counted in the rollups
+    assert server.rollup_recorder.stats()["recorded"] == 1